@@ -23,30 +23,91 @@ Features / 功能特点:
 """
 import os
 import asyncio
+import hashlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+import orjson
 
 from core.memory.factory import MemorySystemFactory
 from utils.logger import get_logger
 
 api_logger = get_logger('api')
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: startup initialization and shutdown cleanup / 应用生命周期：启动初始化与关闭清理"""
+    global chat_manager, semantic_cache, _ctx
+    chat_manager = await create_chat_manager()
+    _ctx = _BoundChatContext(
+        chat=chat_manager.chat,
+        chat_stream=chat_manager.chat_stream,
+        get_all_memories=chat_manager.get_all_memories,
+        get_all_snapshots=chat_manager.get_all_snapshots,
+        iter_all_memories=chat_manager.iter_all_memories,
+        iter_all_snapshots=chat_manager.iter_all_snapshots,
+        update_snapshots=chat_manager.snapshot_manager.update_snapshots,
+        clear_all=chat_manager.clear_all,
+    )
+    # 列表缓存的失效挂在存储worker的写入完成之后：
+    # 在请求返回时失效会早于后台写入，期间的GET会把旧数据重新缓存住
+    chat_manager.on_memories_changed = _invalidate_list_caches
+
+    # 初始化语义缓存（仅作为加速层，失败时不影响服务启动）
+    try:
+        from core.chat.semantic_cache import SemanticResponseCache
+        semantic_cache = SemanticResponseCache()
+        # 同一缓存实例注入聊天管理器，HTTP与WebSocket路径共享命中
+        chat_manager.semantic_cache = semantic_cache
+        api_logger.info("Semantic cache initialized / 语义缓存初始化完成")
+    except Exception as e:
+        semantic_cache = None
+        api_logger.warning(f"Semantic cache unavailable / 语义缓存不可用: {str(e)}")
+
+    # 预热关键路径：首次用户请求不再承担模型加载和冷启动开销
+    try:
+        if semantic_cache:
+            await semantic_cache._embed("warmup")
+        await _ctx.get_all_memories()
+        await _ctx.get_all_snapshots()
+        api_logger.info("Warmup completed / 预热完成")
+    except Exception as e:
+        api_logger.warning(f"Warmup failed / 预热失败: {str(e)}")
+
+    yield
+
+    # 关闭时释放HTTP连接池
+    try:
+        await chat_manager.aclose()
+    except Exception:
+        pass
+
 # Create FastAPI application / 创建FastAPI应用
 app = FastAPI(
     title="AI Assistant API / AI助手API",
     description="API interface for AI assistant system with memory capabilities / 具有记忆能力的AI助手系统API接口",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# 大的列表响应（/memories、/snapshots）启用gzip压缩
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Configure CORS / 配置CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # Frontend URL / 前端URL
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # 预检结果缓存一天，减少OPTIONS往返
 )
 
 # Create chat manager / 创建聊天管理器
@@ -59,11 +120,96 @@ async def create_chat_manager() -> 'ChatManager':
 # Get chat manager instance / 获取聊天管理器实例
 chat_manager: Optional['ChatManager'] = None
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the chat manager on application startup / 在应用启动时初始化聊天管理器"""
-    global chat_manager
-    chat_manager = await create_chat_manager()
+@dataclass(frozen=True, slots=True)
+class _BoundChatContext:
+    """
+    Pre-bound hot-path methods / 预绑定的热路径方法
+
+    启动时把聊天管理器上的常用方法绑定到一个frozen dataclass里，
+    请求处理时只做一次全局查找，省去逐级属性解析的开销
+    """
+    chat: Any
+    chat_stream: Any
+    get_all_memories: Any
+    get_all_snapshots: Any
+    iter_all_memories: Any
+    iter_all_snapshots: Any
+    update_snapshots: Any
+    clear_all: Any
+
+_ctx: Optional[_BoundChatContext] = None
+
+# 预构建的热错误路径异常，避免每次失败都重新分配对象和拼接字符串
+_NOT_INITIALIZED = HTTPException(
+    status_code=503,
+    detail="Chat manager not initialized / 聊天管理器未初始化"
+)
+
+# Semantic response cache instance / 语义响应缓存实例
+semantic_cache = None
+
+# Exact-match response cache / 精确匹配响应缓存
+# 命中时直接返回缓存结果，跳过整个记忆检索+LLM生成流程
+# Admission control for LLM calls / LLM调用的准入控制
+# 限制同时在途的聊天请求数量，饱和时快速返回503而不是无界排队
+_MAX_INFLIGHT_CHAT = int(os.getenv("MAX_INFLIGHT_CHAT", "16"))
+_chat_semaphore = asyncio.Semaphore(_MAX_INFLIGHT_CHAT)
+_CHAT_ACQUIRE_TIMEOUT = 0.05
+
+# In-flight request coalescing / 在途请求合并
+# 相同缓存键的并发请求只触发一次LLM调用，其余请求等待并复用结果
+_inflight: Dict[bytes, asyncio.Future] = {}
+_inflight_lock = asyncio.Lock()
+
+# 预构建的API调用上下文模板：关闭分支每次请求内容完全相同，
+# 直接整体合并模板，省去逐键update
+_API_CTX_OFF: Dict[str, Any] = {
+    'enable_api_call': False,
+    'api_docs': '',
+    'api_warning': ''
+}
+_API_CALL_WARNING = '注意：API调用可能会增加响应时间'
+
+_RESPONSE_CACHE_CAPACITY = 1024
+_response_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_response_cache_lock = asyncio.Lock()
+
+# 单帧发送的最长等待时间：消费过慢的客户端不应无限期占用
+# 一轮对话的信号量额度，超时即视为失活连接并断开
+_WS_SEND_TIMEOUT = 10.0
+
+async def _ws_send_json(websocket: WebSocket, obj: Dict[str, Any]) -> None:
+    """Send a JSON payload over WebSocket via orjson / 使用orjson发送WebSocket JSON消息
+
+    发送有背压上限：超过_WS_SEND_TIMEOUT仍未被传输层接收时关闭连接，
+    避免慢客户端把思考步骤无界堆积在发送缓冲区里
+    """
+    # OPT_SERIALIZE_NUMPY: 思考步骤里可能夹带numpy标量（如重排分数）
+    payload = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        await asyncio.wait_for(websocket.send_bytes(payload), timeout=_WS_SEND_TIMEOUT)
+    except TimeoutError:
+        api_logger.warning("WebSocket发送超时，关闭慢客户端连接")
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+        raise WebSocketDisconnect(1011)
+
+def _response_cache_key(message: 'Message') -> bytes:
+    """
+    Compute the cache key for a chat message / 计算聊天消息的缓存键
+
+    The key covers the message content and any context that affects
+    the response / 缓存键包含消息内容以及会影响响应的上下文信息
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(message.content.encode("utf-8"))
+    if message.context:
+        hasher.update(repr(sorted(message.context.items())).encode("utf-8"))
+    hasher.update(b"1" if message.enable_api_call else b"0")
+    hasher.update(message.api_docs.encode("utf-8"))
+    return hasher.digest()
 
 class Message(BaseModel):
     """
@@ -75,8 +221,10 @@ class Message(BaseModel):
         enable_api_call: Whether to enable API call functionality / 是否启用API调用功能
         api_docs: API documentation content when API call is enabled / 启用API调用时的API文档内容
     """
+    model_config = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
     content: str = Field(..., description="The message content / 消息内容")
-    context: Dict[str, Any] = Field(default={}, description="Optional context information / 可选的上下文信息")
+    context: Dict[str, Any] = Field(default_factory=dict, description="Optional context information / 可选的上下文信息")
     enable_api_call: bool = Field(default=False, description="Whether to enable API call functionality / 是否启用API调用功能")
     api_docs: str = Field(default="", description="API documentation content / API文档内容")
 
@@ -90,10 +238,13 @@ class Memory(BaseModel):
         timestamp: When the memory was created / 记忆创建时间
         metadata: Associated metadata / 相关的元数据
     """
+    model_config = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
     id: int = Field(..., description="Memory ID / 记忆ID")
     content: str = Field(..., description="Memory content / 记忆内容")
     timestamp: str = Field(..., description="Creation timestamp / 创建时间戳")
-    metadata: Dict[str, Any] = Field(..., description="Metadata / 元数据")
+    # 元数据的内容不做逐项校验，标注为Any以跳过逐值验证
+    metadata: Any = Field(..., description="Metadata / 元数据")
 
 class Snapshot(BaseModel):
     """
@@ -105,10 +256,52 @@ class Snapshot(BaseModel):
         timestamp: When the snapshot was created / 快照创建时间
         metadata: Associated metadata / 相关的元数据
     """
+    model_config = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
     id: int = Field(..., description="Snapshot ID / 快照ID")
     content: str = Field(..., description="Snapshot content / 快照内容")
     timestamp: str = Field(..., description="Creation timestamp / 创建时间戳")
-    metadata: Dict[str, Any] = Field(..., description="Metadata / 元数据")
+    # 元数据的内容不做逐项校验，标注为Any以跳过逐值验证
+    metadata: Any = Field(..., description="Metadata / 元数据")
+
+# 模块级TypeAdapter，只构建一次校验/序列化器并复用
+# 列表接口直接用它校验并序列化为字节，跳过FastAPI的response_model二次校验
+MEMORY_LIST_ADAPTER = TypeAdapter(List[Memory])
+SNAPSHOT_LIST_ADAPTER = TypeAdapter(List[Snapshot])
+
+# 列表接口的预序列化缓存：保存整个响应的字节串，
+# 仅在写路径（新记忆、快照更新、清空）时失效，读路径零序列化开销。
+# 代计数器防止读-改竞态：重建期间落在await里的失效不能被旧字节覆盖
+_memories_cache: Optional[bytes] = None
+_snapshots_cache: Optional[bytes] = None
+_list_cache_gen = 0
+
+def _invalidate_list_caches() -> None:
+    """写路径调用：使列表接口的预序列化缓存失效"""
+    global _memories_cache, _snapshots_cache, _list_cache_gen
+    _list_cache_gen += 1
+    _memories_cache = None
+    _snapshots_cache = None
+
+class ThinkingStep(BaseModel):
+    """
+    Thinking step model / 思考步骤模型
+
+    所有思考步骤（输入分析、记忆分析、API调用等）共享同一结构，
+    用具体模型代替Dict[str, Any]，让pydantic-core走固定schema的快路径
+
+    Attributes / 属性:
+        type: Step type identifier / 步骤类型标识
+        description: Step description / 步骤描述
+        result: Step result text / 步骤结果文本
+        timestamp: When the step was recorded / 步骤记录时间
+    """
+    model_config = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
+    type: str = Field(..., description="Step type / 步骤类型")
+    description: str = Field(..., description="Step description / 步骤描述")
+    result: Optional[str] = Field(default=None, description="Step result / 步骤结果")
+    timestamp: Optional[str] = Field(default=None, description="Timestamp / 时间戳")
 
 class ChatResponse(BaseModel):
     """
@@ -118,8 +311,10 @@ class ChatResponse(BaseModel):
         response: The response text / 响应文本
         thinking_steps: The AI's thinking steps / AI的思考步骤
     """
+    model_config = ConfigDict(extra='ignore', frozen=True, validate_assignment=False)
+
     response: str = Field(..., description="Response text / 响应文本")
-    thinking_steps: List[Dict[str, Any]] = Field(..., description="AI's thinking steps / AI的思考步骤")
+    thinking_steps: List[ThinkingStep] = Field(..., description="AI's thinking steps / AI的思考步骤")
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(message: Message):
@@ -139,30 +334,87 @@ async def chat(message: Message):
                       如果聊天管理器未初始化或处理失败
     """
     try:
-        if not chat_manager:
-            raise HTTPException(status_code=503, detail="Chat manager not initialized / 聊天管理器未初始化")
-            
-        # 添加API调用相关的上下文信息
-        context = message.context or {}
+        ctx = _ctx
+        if ctx is None:
+            raise _NOT_INITIALIZED
+
+        # 检查响应缓存，命中时跳过LLM调用
+        cache_key = _response_cache_key(message)
+        async with _response_cache_lock:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                _response_cache.move_to_end(cache_key)
+                return ChatResponse.model_construct(**cached)
+
+        # 语义缓存由ChatManager.chat_stream统一处理，HTTP与WS共享同一层
+
+        # 添加API调用相关的上下文信息（合并模板，不修改消息自带的context）
         if message.enable_api_call:
-            context.update({
+            context = {
+                **message.context,
                 'enable_api_call': True,
                 'api_docs': message.api_docs,
-                'api_warning': '注意：API调用可能会增加响应时间'
-            })
+                'api_warning': _API_CALL_WARNING
+            }
         else:
-            context.update({
-                'enable_api_call': False,
-                'api_docs': '',
-                'api_warning': ''
-            })
-            
-        result = await chat_manager.chat(message.content, context)
-        return ChatResponse(
+            context = {**message.context, **_API_CTX_OFF}
+
+        
+        # 请求合并：同一缓存键已有在途请求时直接等待其结果
+        loop = asyncio.get_running_loop()
+        async with _inflight_lock:
+            inflight = _inflight.get(cache_key)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = loop.create_future()
+                _inflight[cache_key] = inflight
+
+        if not is_leader:
+            result = await inflight
+        else:
+            try:
+                # 准入控制：饱和时快速失败，避免在途请求无限堆积
+                try:
+                    async with asyncio.timeout(_CHAT_ACQUIRE_TIMEOUT):
+                        await _chat_semaphore.acquire()
+                except TimeoutError:
+                    raise HTTPException(status_code=503, detail="Server overloaded / 服务过载，请稍后重试")
+
+                try:
+                    result = await ctx.chat(message.content, context)
+                finally:
+                    _chat_semaphore.release()
+
+                inflight.set_result(result)
+            except BaseException as e:
+                if not inflight.done():
+                    inflight.set_exception(e)
+                    inflight.exception()  # 无等待者时标记异常已消费
+                raise
+            finally:
+                async with _inflight_lock:
+                    _inflight.pop(cache_key, None)
+
+        # 写入响应缓存，超出容量时淘汰最旧的条目；
+        # 失败结果（道歉兜底文案）不入缓存，故障恢复后重新走完整流程
+        if not result.get('error'):
+            async with _response_cache_lock:
+                _response_cache[cache_key] = {
+                    'response': result['response'],
+                    'thinking_steps': result['thinking_steps']
+                }
+                while len(_response_cache) > _RESPONSE_CACHE_CAPACITY:
+                    _response_cache.popitem(last=False)
+
+        # 响应内容来自内部流程，使用model_construct跳过重复校验
+        return ChatResponse.model_construct(
             response=result['response'],
             thinking_steps=result['thinking_steps']
         )
-        
+
+    except HTTPException:
+        # 预构建的503（未初始化/过载）原样透传，不被下面的兜底500吞掉
+        raise
     except Exception as e:
         api_logger.error(f"Failed to process chat request / 处理聊天请求失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -184,54 +436,69 @@ async def websocket_endpoint(websocket: WebSocket):
         
         while True:
             try:
-                # 等待接收消息
-                data = await websocket.receive_json()
-                content = data.get("content", "")
-                enable_api_call = data.get("enable_api_call", False)
-                api_docs = data.get("api_docs", "")
-                
-                # 清空之前的思考步骤
-                await websocket.send_json({
-                    "type": "thinking_clear"
-                })
+                # 等待接收消息：二进制帧直接按bytes解析（零拷贝进pydantic-core），
+                # 文本帧走同一解析入口，均跳过json.loads再构建dict的中间步骤
+                frame = await websocket.receive()
+                if frame.get("type") == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code") or 1000)
+                raw = frame.get("bytes")
+                if raw is None:
+                    raw = frame["text"]
+                message = Message.model_validate_json(raw)
+                content = message.content
+                enable_api_call = message.enable_api_call
+                api_docs = message.api_docs
                 
                 # 处理用户消息并获取回复
-                if not chat_manager:
-                    await websocket.send_json({
+                ctx = _ctx
+                if ctx is None:
+                    await _ws_send_json(websocket, {
                         "type": "error",
                         "message": "Chat manager not initialized"
                     })
                     continue
                 
                 # 构建上下文信息
-                context = {}
                 if enable_api_call:
-                    context.update({
+                    context = {
                         'enable_api_call': True,
                         'api_docs': api_docs,
-                        'api_warning': '注意：API调用可能会增加响应时间'
-                    })
+                        'api_warning': _API_CALL_WARNING
+                    }
                 else:
-                    context.update({
-                        'enable_api_call': False,
-                        'api_docs': '',
-                        'api_warning': ''
-                    })
-                    
-                result = await chat_manager.chat(content, context)
-                
-                # 发送思考步骤
-                if 'thinking_steps' in result:
-                    for step in result['thinking_steps']:
-                        await websocket.send_json({
-                            "type": "thinking_step",
-                            "step": step
-                        })
+                    context = dict(_API_CTX_OFF)
+
                 
+                # 准入控制与HTTP接口共享同一信号量
+                try:
+                    async with asyncio.timeout(_CHAT_ACQUIRE_TIMEOUT):
+                        await _chat_semaphore.acquire()
+                except TimeoutError:
+                    await _ws_send_json(websocket, {
+                        "type": "error",
+                        "message": "Server overloaded / 服务过载，请稍后重试"
+                    })
+                    continue
+
+                # 流式转发：思考步骤一经产生立即推送给客户端，
+                # 无需等待整轮LLM生成结束
+                response_text = ''
+                thinking_steps = []
+                try:
+                    await _ws_send_json(websocket, {"type": "thinking_clear"})
+                    async for event in ctx.chat_stream(content, context):
+                        if event['type'] == 'thinking_step':
+                            thinking_steps.append(event['step'])
+                            await _ws_send_json(websocket, event)
+                        elif event['type'] == 'message':
+                            response_text = event['response']
+                finally:
+                    _chat_semaphore.release()
+
                 # 发送最终回复
-                await websocket.send_json({
+                await _ws_send_json(websocket, {
                     "type": "message",
-                    "response": result['response']
+                    "response": response_text
                 })
                 
             except WebSocketDisconnect:
@@ -240,7 +507,7 @@ async def websocket_endpoint(websocket: WebSocket):
             except Exception as e:
                 api_logger.error(f"处理消息时发生错误: {str(e)}")
                 try:
-                    await websocket.send_json({
+                    await _ws_send_json(websocket, {
                         "type": "error",
                         "message": f"处理消息时发生错误: {str(e)}"
                     })
@@ -255,7 +522,7 @@ async def websocket_endpoint(websocket: WebSocket):
     finally:
         api_logger.info("WebSocket连接关闭")
 
-@app.get("/memories", response_model=List[Memory])
+@app.get("/memories")
 async def get_memories():
     """
     Retrieve all stored memories / 获取所有存储的记忆
@@ -267,17 +534,63 @@ async def get_memories():
         HTTPException: If memory retrieval fails / 如果记忆检索失败
     """
     try:
-        if not chat_manager:
-            raise HTTPException(status_code=503, detail="Chat manager not initialized / 聊天管理器未初始化")
-            
-        memories = await chat_manager.get_all_memories()
-        return memories
-        
+        ctx = _ctx
+        if ctx is None:
+            raise _NOT_INITIALIZED
+
+        global _memories_cache
+        body = _memories_cache
+        if body is None:
+            gen = _list_cache_gen
+            memories = await ctx.get_all_memories()
+            body = MEMORY_LIST_ADAPTER.dump_json(
+                MEMORY_LIST_ADAPTER.validate_python(memories)
+            )
+            # await期间发生过失效则读到的是写入前的数据，只返回不回填
+            if gen == _list_cache_gen:
+                _memories_cache = body
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
     except Exception as e:
         api_logger.error(f"Failed to get memories / 获取记忆失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/snapshots", response_model=List[Snapshot])
+@app.get("/memories/stream")
+async def stream_memories():
+    """
+    Stream all memories as NDJSON / 以NDJSON流式返回所有记忆
+
+    每行一个记忆对象，客户端可以边接收边解析，
+    避免为大结果集在内存中拼装整块JSON响应体
+    """
+    ctx = _ctx
+    if ctx is None:
+        raise _NOT_INITIALIZED
+
+    async def _generate():
+        async for memory in ctx.iter_all_memories():
+            yield orjson.dumps(memory) + b"\n"
+
+    return StreamingResponse(_generate(), media_type="application/x-ndjson")
+
+@app.get("/snapshots/stream")
+async def stream_snapshots():
+    """
+    Stream all snapshots as NDJSON / 以NDJSON流式返回所有快照
+    """
+    ctx = _ctx
+    if ctx is None:
+        raise _NOT_INITIALIZED
+
+    async def _generate():
+        async for snapshot in ctx.iter_all_snapshots():
+            yield orjson.dumps(snapshot) + b"\n"
+
+    return StreamingResponse(_generate(), media_type="application/x-ndjson")
+
+@app.get("/snapshots")
 async def get_snapshots():
     """
     Retrieve all memory snapshots / 获取所有记忆快照
@@ -289,12 +602,25 @@ async def get_snapshots():
         HTTPException: If snapshot retrieval fails / 如果快照检索失败
     """
     try:
-        if not chat_manager:
-            raise HTTPException(status_code=503, detail="Chat manager not initialized / 聊天管理器未初始化")
-            
-        snapshots = await chat_manager.get_all_snapshots()
-        return snapshots
-        
+        ctx = _ctx
+        if ctx is None:
+            raise _NOT_INITIALIZED
+
+        global _snapshots_cache
+        body = _snapshots_cache
+        if body is None:
+            gen = _list_cache_gen
+            snapshots = await ctx.get_all_snapshots()
+            body = SNAPSHOT_LIST_ADAPTER.dump_json(
+                SNAPSHOT_LIST_ADAPTER.validate_python(snapshots)
+            )
+            # await期间发生过失效则读到的是写入前的数据，只返回不回填
+            if gen == _list_cache_gen:
+                _snapshots_cache = body
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
     except Exception as e:
         api_logger.error(f"Failed to get snapshots / 获取快照失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -311,12 +637,16 @@ async def update_snapshots():
         HTTPException: If update fails / 如果更新失败
     """
     try:
-        if not chat_manager:
-            raise HTTPException(status_code=503, detail="Chat manager not initialized / 聊天管理器未初始化")
-            
-        await chat_manager.snapshot_manager.update_snapshots()
+        ctx = _ctx
+        if ctx is None:
+            raise _NOT_INITIALIZED
+
+        await ctx.update_snapshots()
+        _invalidate_list_caches()
         return {"message": "Snapshots updated successfully / 快照更新成功"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         api_logger.error(f"Failed to update snapshots / 更新快照失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -333,16 +663,53 @@ async def clear_memories():
         HTTPException: If clearing fails / 如果清空失败
     """
     try:
-        if not chat_manager:
-            raise HTTPException(status_code=503, detail="Chat manager not initialized / 聊天管理器未初始化")
-            
-        await chat_manager.clear_all()
+        ctx = _ctx
+        if ctx is None:
+            raise _NOT_INITIALIZED
+
+        await ctx.clear_all()
+        _invalidate_list_caches()
+
+        # 记忆清空后缓存的回复已失效，一并清空
+        async with _response_cache_lock:
+            _response_cache.clear()
+        if semantic_cache:
+            await semantic_cache.clear()
+
         return {"message": "All memories cleared successfully / 所有记忆清空成功"}
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         api_logger.error(f"Failed to clear memories / 清空记忆失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/cache")
+async def clear_response_cache():
+    """
+    Clear the chat response cache / 清空聊天响应缓存
+
+    Returns / 返回:
+        Success message / 成功消息
+    """
+    async with _response_cache_lock:
+        _response_cache.clear()
+    if semantic_cache:
+        await semantic_cache.clear()
+    return {"message": "Response cache cleared successfully / 响应缓存清空成功"}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        # 列表/响应缓存及其失效都在进程内，多worker之间互不可见，
+        # 在引入跨进程失效之前默认单worker
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        # uvloop在Windows上不可用，可通过UVICORN_LOOP=asyncio回退
+        loop=os.getenv("UVICORN_LOOP", "uvloop"),
+        http=os.getenv("UVICORN_HTTP", "httptools"),
+        ws="websockets",
+        ws_per_message_deflate=True,
+    )
@@ -1,6 +1,7 @@
 """
 提示词配置模块
 """
+from string import Formatter
 
 MEMORY_PROMPTS = {
     'needs_memory': """请判断以下问题是否需要查询历史记忆来回答（只需返回JSON格式的true或false）：
@@ -33,4 +34,35 @@ MEMORY_PROMPTS = {
 {{
     "scores": [0.8, 0.2, 0.5, ...]
 }}"""
-} 
\ No newline at end of file
+} 
+# 预解析的模板段：str.format每次调用都要重新解析模板，
+# 这里在导入时用string.Formatter把模板拆成(字面量, 字段名)段，
+# 渲染时只做列表拼接和字典查找
+_PARSED_PROMPTS = {
+    name: [
+        (literal, field)
+        for literal, field, _spec, _conv in Formatter().parse(template)
+    ]
+    for name, template in MEMORY_PROMPTS.items()
+}
+
+def render_prompt(name: str, **kwargs) -> str:
+    """
+    渲染预解析的提示词模板
+
+    等价于 MEMORY_PROMPTS[name].format(**kwargs)，但跳过重复的模板解析
+
+    Args:
+        name: 模板名称
+        **kwargs: 模板变量
+
+    Returns:
+        str: 渲染后的提示词
+    """
+    parts = []
+    for literal, field in _PARSED_PROMPTS[name]:
+        if literal:
+            parts.append(literal)
+        if field is not None:
+            parts.append(str(kwargs[field]))
+    return ''.join(parts)
@@ -1,7 +1,8 @@
 """
 聊天管理器模块
 """
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
+from collections import OrderedDict, deque
 from datetime import datetime
 from services.llm_service import LLMService
 from core.storage.memory_storage import MemoryStorage
@@ -9,14 +10,33 @@ from core.snapshot.snapshot_manager import SnapshotManager
 from utils.logger import get_logger
 import asyncio
 import httpx
-import json
+import orjson
+import time
 
 chat_logger = get_logger('chat')
 
+# 单次API调用响应体上限：并发扇出时限制峰值内存占用
+MAX_API_RESPONSE_BYTES = 1024 * 1024
+
+def _call_key(call: Dict[str, Any]) -> bytes:
+    """API调用的归一化键：方法、地址、参数和数据相同视为同一调用"""
+    return orjson.dumps({
+        'method': call.get('method', 'GET'),
+        'url': call.get('url', ''),
+        'headers': call.get('headers', {}),
+        'params': call.get('params', {}),
+        'data': call.get('data', {})
+    }, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+def _pretty(obj: Any) -> str:
+    """思考步骤展示用的JSON格式化（orjson的C实现缩进，替代json.dumps）"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
 class ChatManager:
     """聊天管理器"""
     
-    def __init__(self, llm_service: LLMService, storage: MemoryStorage, snapshot_manager: SnapshotManager):
+    def __init__(self, llm_service: LLMService, storage: MemoryStorage, snapshot_manager: SnapshotManager,
+                 semantic_cache=None):
         """
         初始化聊天管理器
         
@@ -24,137 +44,160 @@ class ChatManager:
             llm_service: LLM服务实例
             storage: 存储实例
             snapshot_manager: 快照管理器实例
+            semantic_cache: 可选的语义响应缓存，命中时跳过整个LLM流程
         """
         self.llm_service = llm_service
         self.storage = storage
         self.snapshot_manager = snapshot_manager
-        self.history = []
-        self.http_client = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+        self.semantic_cache = semantic_cache
+        # maxlen由deque在C层维护，追加时自动淘汰最旧记录
+        self.history = deque(maxlen=20)
+        # 显式连接池上限 + HTTP/2：长连接复用省掉每次请求的TCP/TLS握手
+        self.http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0
+            )
+        )
+        # 有界的后台存储队列：单个worker顺序消费，突发流量下
+        # 不再积累散落的fire-and-forget任务，队满时自然形成背压
+        self._storage_queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self._storage_worker_task: Optional[asyncio.Task] = None
+        # 快照序列化片段缓存：content/isoformat只在首次见到该快照时构建
+        self._snapshot_fragments: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        # 存储写入真正落库后的通知回调（API层用它来失效列表缓存，
+        # 写入发生在后台worker里，在请求返回时失效会过早）
+        self.on_memories_changed: Optional[Callable[[], None]] = None
+        # 限制单轮对话内并发的API调用数，避免打爆目标主机
+        self._api_call_semaphore = asyncio.Semaphore(10)
         chat_logger.info("聊天管理器初始化完成")
     
-    async def chat(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def chat_stream(self, query: str, context: Optional[Dict[str, Any]] = None):
         """
-        处理用户输入，生成回复
-        
+        流式处理用户输入：思考步骤一经产生立即产出，最后产出最终回复
+
+        事件格式：
+            {'type': 'thinking_step', 'step': {...}}  思考步骤
+            {'type': 'message', 'response': str}      最终回复
+
         Args:
             query: 用户输入
             context: 上下文信息，包含API调用相关设置
-            
-        Returns:
-            Dict[str, Any]: 包含回复文本和思考步骤的字典
+
+        Yields:
+            Dict[str, Any]: 思考步骤事件和最终回复事件
         """
         try:
             chat_logger.info("收到用户输入：%s", query)
-            
+
             # 准备上下文
             context = context or {}
+
+            # 语义缓存：近似重复的问题直接复用缓存的回复，
+            # 省掉快照检索、API分析和LLM生成整条链路
+            use_cache = self.semantic_cache is not None and not context.get('enable_api_call')
+            if use_cache:
+                cached = await self.semantic_cache.get(query)
+                if cached is not None:
+                    for step in cached.get('thinking_steps', []):
+                        yield {'type': 'thinking_step', 'step': step}
+                    self._add_to_history(query, cached['response'])
+                    yield {'type': 'message', 'response': cached['response']}
+                    return
+
+            # 消费方只做len()和迭代，deque可以直接传，省一次每轮拷贝
             context.update({
                 'history': self.history,
             })
-            
-            # 获取相关记忆
-            relevant_snapshots = await self.snapshot_manager.get_relevant_snapshots(query)
+
+            # API调用阶段产生的思考步骤
+            api_steps = []
+            api_enabled = bool(context.get('enable_api_call') and context.get('api_docs'))
+            api_analysis = None
+
+            if api_enabled:
+                chat_logger.info("API调用已启用，正在分析API文档")
+                step = {
+                    'type': 'api_feature_check',
+                    'description': 'API功能状态',
+                    'result': '已启用API调用功能，我将尝试通过调用API来获取所需信息。'
+                }
+                api_steps.append(step)
+                yield {'type': 'thinking_step', 'step': step}
+
+                # 快照检索和API文档分析是两个独立的网络往返，
+                # 用TaskGroup并发执行，总耗时取两者较大值
+                async with asyncio.TaskGroup() as tg:
+                    snapshot_task = tg.create_task(
+                        self.snapshot_manager.get_relevant_snapshots(query)
+                    )
+                    api_task = tg.create_task(self.llm_service.analyze_api(
+                        query=query,
+                        api_docs=context['api_docs'],
+                        context=context
+                    ))
+                relevant_snapshots = snapshot_task.result()
+                api_analysis = api_task.result()
+            else:
+                relevant_snapshots = await self.snapshot_manager.get_relevant_snapshots(query)
+
+            # 获取相关记忆（固定字段按快照ID缓存，只有score每轮变化）
             if relevant_snapshots:
                 context['relevant_memories'] = [
-                    {
-                        'content': snapshot.content,
-                        'score': score,
-                        'timestamp': snapshot.timestamp.isoformat()
-                    }
+                    {**self._snapshot_fragment(snapshot), 'score': score}
                     for snapshot, score in relevant_snapshots
                 ]
-            
+
             # 如果启用了API调用
-            if context.get('enable_api_call') and context.get('api_docs'):
-                chat_logger.info("API调用已启用，正在分析API文档")
-                # 添加API调用相关的思考步骤
-                thinking_steps = []
-                thinking_steps.append({
-                    'type': 'api_feature_check',
-                    'description': 'API功能状态',
-                    'result': '已启用API调用功能，我将尝试通过调用API来获取所需信息。'
-                })
-                
-                # 让LLM分析API文档和用户需求
-                api_analysis = await self.llm_service.analyze_api(
-                    query=query,
-                    api_docs=context['api_docs'],
-                    context=context
-                )
-                
+            if api_enabled:
                 # 添加API分析的思考步骤
-                if 'thinking_steps' in api_analysis:
-                    thinking_steps.extend(api_analysis['thinking_steps'])
-                
+                for step in api_analysis.get('thinking_steps', []):
+                    api_steps.append(step)
+                    yield {'type': 'thinking_step', 'step': step}
+
                 # 如果需要调用API
                 if api_analysis.get('should_call_api', False):
                     api_calls = api_analysis.get('api_calls', [])
-                    api_results = []
-                    
+
+                    # 各API调用相互独立，并发发出后按原顺序汇总结果，
+                    # N次往返的总耗时从 N × RTT 降到最慢一次的RTT；
+                    # LLM偶尔会规划出完全相同的调用，按归一化键去重复用
+                    call_tasks: Dict[bytes, asyncio.Task] = {}
+                    plan: List[tuple] = []
                     for i, call in enumerate(api_calls, 1):
-                        thinking_steps.append({
-                            'type': 'api_request',
-                            'description': f'发送API请求 #{i}',
-                            'result': f"""正在发送API请求：
-- 接口：{call.get('url', '')}
-- 方法：{call.get('method', 'GET')}
-- 目的：{call.get('purpose', '未指定')}
-- 参数：{json.dumps(call.get('params', {}), ensure_ascii=False, indent=2)}
-- 数据：{json.dumps(call.get('data', {}), ensure_ascii=False, indent=2)}"""
-                        })
-                        
-                        try:
-                            # 执行API调用
-                            response = await self.http_client.request(
-                                method=call.get('method', 'GET'),
-                                url=call['url'],
-                                headers=call.get('headers', {}),
-                                params=call.get('params', {}),
-                                json=call.get('data', {})
-                            )
-                            
-                            # 解析响应
-                            result = response.json() if response.text else None
-                            api_results.append({
-                                'success': True,
-                                'data': result,
-                                'status_code': response.status_code
-                            })
-                            
-                            thinking_steps.append({
-                                'type': 'api_response',
-                                'description': f'API响应 #{i}',
-                                'result': f"""收到API响应：
-- 状态码：{response.status_code}
-- 响应数据：{json.dumps(result, ensure_ascii=False, indent=2)}
-- 数据分析：正在解析API返回的数据，以提取有用信息。"""
-                            })
-                            
-                        except Exception as e:
-                            error_msg = f"API调用失败：{str(e)}"
-                            chat_logger.error(error_msg)
-                            api_results.append({
-                                'success': False,
-                                'error': str(e)
-                            })
-                            
-                            thinking_steps.append({
-                                'type': 'api_error',
-                                'description': f'API错误 #{i}',
-                                'result': f"""API调用出错：
-- 错误信息：{str(e)}
-- 错误分析：
-  1. 可能是网络连接问题
-  2. API地址可能不正确
-  3. 请求参数可能有误
-  4. API服务器可能暂时不可用
-- 解决方案：我将尝试其他方式回答您的问题"""
-                            })
-                    
+                        key = _call_key(call)
+                        task = call_tasks.get(key)
+                        is_duplicate = task is not None
+                        if not is_duplicate:
+                            task = asyncio.ensure_future(self._do_one_call(i, call))
+                            call_tasks[key] = task
+                        plan.append((i, task, is_duplicate))
+
+                    if call_tasks:
+                        await asyncio.gather(*call_tasks.values())
+
+                    api_results = []
+                    for i, task, is_duplicate in plan:
+                        outcome, steps = task.result()
+                        api_results.append(outcome)
+                        if is_duplicate:
+                            steps = [{
+                                'type': 'api_dedup',
+                                'description': f'API请求 #{i}',
+                                'result': '该请求与本轮此前的请求完全相同，直接复用其结果。'
+                            }]
+                        for step in steps:
+                            api_steps.append(step)
+                            yield {'type': 'thinking_step', 'step': step}
+
                     # 添加API调用总结
                     success_count = sum(1 for r in api_results if r['success'])
                     total_count = len(api_results)
-                    thinking_steps.append({
+                    step = {
                         'type': 'api_summary',
                         'description': 'API调用总结',
                         'result': f"""API调用情况：
@@ -162,33 +205,205 @@ class ChatManager:
 - 成功调用：{success_count} 个
 - 失败调用：{total_count - success_count} 个
 - 后续处理：我将根据获取到的API数据为您生成答案。"""
-                    })
-                    
+                    }
+                    api_steps.append(step)
+                    yield {'type': 'thinking_step', 'step': step}
+
                     # 更新上下文，加入API调用结果
                     context['api_results'] = api_results
-            
+
             # 生成最终回复
             result = await self.llm_service.chat(query, context)
-            
-            # 如果之前有API调用的思考步骤，添加到结果中
-            if 'thinking_steps' in locals():
-                result['thinking_steps'] = thinking_steps + result.get('thinking_steps', [])
-            
+
+            # LLM生成阶段的思考步骤
+            for step in result.get('thinking_steps', []):
+                yield {'type': 'thinking_step', 'step': step}
+
+            # 回填语义缓存，供后续相似问题命中；
+            # LLM失败的兜底回复不入缓存，否则高相似度匹配会把
+            # 道歉文案重放给之后所有相近的问题
+            if use_cache and not result.get('error'):
+                await self.semantic_cache.put(query, {
+                    'response': result['response'],
+                    'thinking_steps': api_steps + list(result.get('thinking_steps', []))
+                })
+
             # 更新历史记录
             self._add_to_history(query, result['response'])
-            
-            # 异步处理存储操作
-            asyncio.create_task(self._process_storage(query, result['response']))
-            
-            return result
-            
+
+            # 异步处理存储操作：入队交给后台worker顺序消费
+            await self._enqueue_storage(query, result['response'])
+
+            yield {
+                'type': 'message',
+                'response': result['response'],
+                'error': bool(result.get('error'))
+            }
+
         except Exception as e:
             chat_logger.error("处理对话失败：%s", str(e), exc_info=True)
-            return {
-                'response': "抱歉，处理您的输入时出现了错误。",
-                'thinking_steps': []
+            # 标记失败结果，调用方据此跳过缓存写入，避免道歉文案被长期缓存
+            yield {'type': 'message', 'response': "抱歉，处理您的输入时出现了错误。", 'error': True}
+
+    async def _do_one_call(self, index: int, call: Dict[str, Any]):
+        """
+        执行单个API调用
+
+        Args:
+            index: 调用序号（从1开始，用于思考步骤展示）
+            call: LLM规划的调用描述
+
+        Returns:
+            Tuple[Dict[str, Any], List[Dict[str, Any]]]: 调用结果和对应的思考步骤
+        """
+        steps = [{
+            'type': 'api_request',
+            'description': f'发送API请求 #{index}',
+            'result': f"""正在发送API请求：
+- 接口：{call.get('url', '')}
+- 方法：{call.get('method', 'GET')}
+- 目的：{call.get('purpose', '未指定')}
+- 参数：{_pretty(call.get('params', {}))}
+- 数据：{_pretty(call.get('data', {}))}"""
+        }]
+
+        try:
+            # 执行API调用：流式读取响应体并限制大小，
+            # 超限的响应在下载过程中即被截断，不会整体驻留内存
+            async with self._api_call_semaphore:
+                async with self.http_client.stream(
+                    method=call.get('method', 'GET'),
+                    url=call['url'],
+                    headers=call.get('headers', {}),
+                    params=call.get('params', {}),
+                    json=call.get('data', {})
+                ) as response:
+                    buf = bytearray()
+                    async for chunk in response.aiter_bytes(chunk_size=65536):
+                        buf.extend(chunk)
+                        if len(buf) > MAX_API_RESPONSE_BYTES:
+                            raise ValueError(
+                                f"API响应超过大小上限（{MAX_API_RESPONSE_BYTES}字节）"
+                            )
+
+            # 解析响应：直接用bytes解析，跳过.text的整体解码；
+            # 大响应体放到线程池解析，避免并发扇出时卡住事件循环
+            body = bytes(buf)
+            if not body:
+                result = None
+            elif len(body) > 65536:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None, orjson.loads, body
+                )
+            else:
+                result = orjson.loads(body)
+            outcome = {
+                'success': True,
+                'data': result,
+                'status_code': response.status_code
             }
-    
+
+            steps.append({
+                'type': 'api_response',
+                'description': f'API响应 #{index}',
+                'result': f"""收到API响应：
+- 状态码：{response.status_code}
+- 响应数据：{_pretty(result)}
+- 数据分析：正在解析API返回的数据，以提取有用信息。"""
+            })
+
+        except Exception as e:
+            error_msg = f"API调用失败：{str(e)}"
+            chat_logger.error(error_msg)
+            outcome = {
+                'success': False,
+                'error': str(e)
+            }
+
+            steps.append({
+                'type': 'api_error',
+                'description': f'API错误 #{index}',
+                'result': f"""API调用出错：
+- 错误信息：{str(e)}
+- 错误分析：
+  1. 可能是网络连接问题
+  2. API地址可能不正确
+  3. 请求参数可能有误
+  4. API服务器可能暂时不可用
+- 解决方案：我将尝试其他方式回答您的问题"""
+            })
+
+        return outcome, steps
+
+    async def chat(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        处理用户输入，生成回复
+
+        chat_stream的缓冲封装：收集全部思考步骤和最终回复后一次性返回
+
+        Args:
+            query: 用户输入
+            context: 上下文信息，包含API调用相关设置
+
+        Returns:
+            Dict[str, Any]: 包含回复文本和思考步骤的字典
+        """
+        response = ''
+        thinking_steps = []
+        error = False
+        async for event in self.chat_stream(query, context):
+            if event['type'] == 'thinking_step':
+                thinking_steps.append(event['step'])
+            elif event['type'] == 'message':
+                response = event['response']
+                error = bool(event.get('error'))
+        return {
+            'response': response,
+            'thinking_steps': thinking_steps,
+            'error': error
+        }
+
+    def _snapshot_fragment(self, snapshot) -> Dict[str, Any]:
+        """返回快照的序列化片段（content + isoformat时间戳），按ID缓存"""
+        fragment = self._snapshot_fragments.get(snapshot.id)
+        if fragment is None:
+            fragment = {
+                'content': snapshot.content,
+                'timestamp': snapshot.timestamp.isoformat()
+            }
+            self._snapshot_fragments[snapshot.id] = fragment
+            if len(self._snapshot_fragments) > 1024:
+                self._snapshot_fragments.popitem(last=False)
+        return fragment
+
+    async def _enqueue_storage(self, query: str, response: str):
+        """
+        把一轮对话的存储工作交给后台worker
+
+        Args:
+            query: 用户输入
+            response: AI回复
+        """
+        if self._storage_worker_task is None:
+            self._storage_worker_task = asyncio.create_task(self._storage_worker())
+        try:
+            self._storage_queue.put_nowait((query, response))
+        except asyncio.QueueFull:
+            # 队满时等待而不是丢弃，对上游形成背压
+            await self._storage_queue.put((query, response))
+
+    async def _storage_worker(self):
+        """后台存储worker：顺序消费队列，None为停机哨兵"""
+        while True:
+            item = await self._storage_queue.get()
+            try:
+                if item is None:
+                    return
+                query, response = item
+                await self._process_storage(query, response)
+            finally:
+                self._storage_queue.task_done()
+
     async def _process_storage(self, query: str, response: str):
         """
         异步处理存储操作
@@ -198,18 +413,18 @@ class ChatManager:
             response: AI回复
         """
         try:
-            # 保存记忆
-            memory = await self.storage.save_memory(
-                content=query,
-                metadata={'is_user': True}
-            )
-            await self.storage.save_memory(
-                content=response,
-                metadata={'is_user': False}
-            )
+            # 一次事务批量保存两条记忆，快照只依赖用户输入那条
+            memories = await self.storage.save_memories([
+                (query, {'is_user': True}),
+                (response, {'is_user': False})
+            ])
             
             # 创建快照
-            await self.snapshot_manager.create_snapshot(memory)
+            await self.snapshot_manager.create_snapshot(memories[0])
+            
+            # 落库完成后才通知观察方，此刻读到的已是写入后的数据
+            if self.on_memories_changed is not None:
+                self.on_memories_changed()
             
             chat_logger.info("存储操作完成")
             
@@ -218,23 +433,30 @@ class ChatManager:
     
     def _add_to_history(self, query: str, response: str):
         """添加到历史记录"""
+        # 历史记录只在进程内参与上下文构建，用整数epoch毫秒：
+        # 比isoformat字符串更省内存，序列化成本也更低
+        timestamp = time.time_ns() // 1_000_000
         self.history.extend([
             {
                 'content': query,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp,
                 'is_user': True
             },
             {
                 'content': response,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp,
                 'is_user': False
             }
         ])
-        
-        # 保持历史记录在限定长度内
-        if len(self.history) > 20:
-            self.history = self.history[-20:]
     
+    async def aclose(self):
+        """关闭聊天管理器：排空存储队列并释放网络资源"""
+        if self._storage_worker_task is not None:
+            await self._storage_queue.put(None)
+            await self._storage_worker_task
+            self._storage_worker_task = None
+        await self.http_client.aclose()
+
     async def get_all_memories(self) -> List[Dict[str, Any]]:
         """获取所有记忆"""
         try:
@@ -253,6 +475,18 @@ class ChatManager:
             chat_logger.error("获取快照失败：%s", str(e))
             return []
     
+    async def iter_all_memories(self, page_size: int = 500):
+        """逐条迭代所有记忆（分页拉取，字典形式产出）"""
+        async for batch in self.storage.iter_memories(page_size):
+            for memory in batch:
+                yield memory.to_dict()
+
+    async def iter_all_snapshots(self, page_size: int = 500):
+        """逐条迭代所有快照（分页拉取，字典形式产出）"""
+        async for batch in self.storage.iter_snapshots(page_size):
+            for snapshot in batch:
+                yield snapshot.to_dict()
+
     async def clear_all(self):
         """清空所有记忆和历史记录"""
         try:
@@ -260,6 +494,11 @@ class ChatManager:
             await self.storage.clear_all()
             # 清空历史记录
             self.history.clear()
+            # 快照片段缓存按快照ID索引，而ID在清库后会被SQLite复用，
+            # 不清会把旧快照的内容顶给新快照
+            self._snapshot_fragments.clear()
+            # 快照管理器里的打分/时间戳缓存同样按ID键控，一并失效
+            self.snapshot_manager.invalidate_caches()
             chat_logger.info("所有数据已清空")
         except Exception as e:
             chat_logger.error("清空数据失败：%s", str(e))
@@ -0,0 +1,146 @@
+"""
+语义响应缓存模块
+
+在调用 chat_manager.chat 之前先做一次语义相似度查找：
+将用户输入向量化后在近期查询的FAISS索引中检索，
+若最相似的历史查询相似度超过阈值，则直接返回缓存的响应，
+跳过记忆检索和LLM生成的完整流程。
+"""
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional
+
+# 查询向量LRU缓存容量：get未命中后紧接着的put会复用同一向量
+EMBED_CACHE_CAPACITY = 512
+
+import numpy as np
+import faiss
+from sentence_transformers import SentenceTransformer
+
+from utils.logger import get_logger
+
+cache_logger = get_logger('semantic_cache')
+
+class SemanticResponseCache:
+    """基于向量相似度的响应缓存"""
+
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        vector_dim: int = 384,
+        capacity: int = 4096,
+        threshold: float = 0.92
+    ):
+        """
+        初始化语义缓存
+
+        Args:
+            model_name: embedding模型名称
+            vector_dim: 向量维度
+            capacity: 缓存容量，超出后淘汰最旧的条目
+            threshold: 相似度阈值，top-1相似度达到该值才算命中
+        """
+        self.vector_dim = vector_dim
+        self.capacity = capacity
+        self.threshold = threshold
+
+        # 初始化embedding模型
+        cache_logger.info(f"正在加载embedding模型: {model_name}")
+        self.model = SentenceTransformer(model_name)
+
+        # 使用内积索引配合归一化向量实现余弦相似度检索
+        self.index = faiss.IndexFlatIP(vector_dim)
+
+        # 与索引平行的缓存条目队列（向量 + 响应）
+        self._entries: deque = deque(maxlen=capacity)
+
+        # 同一会话内重复出现的查询跳过embedding模型
+        self._embed_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        self._lock = asyncio.Lock()
+        cache_logger.info("语义缓存初始化完成")
+
+    async def _embed(self, content: str) -> np.ndarray:
+        """生成归一化的查询向量（在线程中执行以避免阻塞事件循环）
+
+        结果按查询原文LRU缓存：一次get未命中后的put、以及
+        会话内重复的查询都不再触发embedding模型
+        """
+        cached = self._embed_cache.get(content)
+        if cached is not None:
+            self._embed_cache.move_to_end(content)
+            return cached
+
+        vector = await asyncio.to_thread(self.model.encode, [content])
+        vector = np.asarray(vector, dtype='float32')
+        faiss.normalize_L2(vector)
+
+        self._embed_cache[content] = vector
+        if len(self._embed_cache) > EMBED_CACHE_CAPACITY:
+            self._embed_cache.popitem(last=False)
+        return vector
+
+    async def get(self, content: str) -> Optional[Dict[str, Any]]:
+        """
+        语义查找缓存的响应
+
+        Args:
+            content: 用户输入
+
+        Returns:
+            Optional[Dict[str, Any]]: 命中时返回缓存的响应字典，否则返回None
+        """
+        try:
+            async with self._lock:
+                if self.index.ntotal == 0:
+                    return None
+
+            vector = await self._embed(content)
+
+            async with self._lock:
+                scores, indices = self.index.search(vector, 1)
+                score = float(scores[0][0])
+                idx = int(indices[0][0])
+
+                if idx < 0 or score < self.threshold:
+                    return None
+
+                cache_logger.info(f"语义缓存命中，相似度: {score:.4f}")
+                return self._entries[idx][1]
+
+        except Exception as e:
+            cache_logger.error(f"语义缓存查找失败: {str(e)}")
+            return None
+
+    async def put(self, content: str, response: Dict[str, Any]) -> None:
+        """
+        写入缓存条目
+
+        Args:
+            content: 用户输入
+            response: 响应字典（包含response和thinking_steps）
+        """
+        try:
+            vector = await self._embed(content)
+
+            async with self._lock:
+                # 队列满时会淘汰最旧的条目，需要重建索引保持对齐
+                rebuild = len(self._entries) == self.capacity
+                self._entries.append((vector, response))
+
+                if rebuild:
+                    self.index = faiss.IndexFlatIP(self.vector_dim)
+                    vectors = np.vstack([v for v, _ in self._entries])
+                    self.index.add(vectors)
+                else:
+                    self.index.add(vector)
+
+        except Exception as e:
+            cache_logger.error(f"语义缓存写入失败: {str(e)}")
+
+    async def clear(self) -> None:
+        """清空缓存"""
+        async with self._lock:
+            self.index = faiss.IndexFlatIP(self.vector_dim)
+            self._entries.clear()
+        cache_logger.info("语义缓存已清空")
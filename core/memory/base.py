@@ -5,9 +5,63 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
-import json
+import orjson
+import numpy as np
+from utils.logger import get_logger
 
-@dataclass
+memory_logger = get_logger('memory')
+
+# 超过此长度的情感/概念列表用NumPy做数值强转，短列表走Python循环
+_VECTORIZE_MIN = 16
+
+def _normalize_emotions(emotions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """把情感列表规整为 {type: str, intensity: float} 的标准形态"""
+    if len(emotions) > _VECTORIZE_MIN:
+        # 数值强转批量走C层，每个元素省一次Python级float()调用
+        intensities = np.fromiter(
+            (e.get("intensity", 0.0) for e in emotions),
+            dtype=np.float64, count=len(emotions)
+        )
+        return [
+            {"type": str(e.get("type", "")), "intensity": intensity}
+            for e, intensity in zip(emotions, intensities.tolist())
+        ]
+    # 把builtin绑定为局部名，循环内免去逐次的全局名查找
+    _str, _float = str, float
+    return [
+        {
+            "type": _str(e.get("type", "")),
+            "intensity": _float(e.get("intensity", 0.0))
+        }
+        for e in emotions
+    ]
+
+def _normalize_concepts(concepts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """把概念列表规整为 {name, type, relevance} 的标准形态"""
+    if len(concepts) > _VECTORIZE_MIN:
+        relevances = np.fromiter(
+            (c.get("relevance", 0.0) for c in concepts),
+            dtype=np.float64, count=len(concepts)
+        )
+        return [
+            {
+                "name": str(c.get("name", "")),
+                "type": str(c.get("type", "")),
+                "relevance": relevance
+            }
+            for c, relevance in zip(concepts, relevances.tolist())
+        ]
+    _str, _float = str, float
+    return [
+        {
+            "name": _str(c.get("name", "")),
+            "type": _str(c.get("type", "")),
+            "relevance": _float(c.get("relevance", 0.0))
+        }
+        for c in concepts
+    ]
+
+@dataclass(slots=True)
 class Emotion:
     """情感数据类"""
     type: str
@@ -26,7 +80,8 @@ class Emotion:
             intensity=data["intensity"]
         )
 
-@dataclass
+# slots=True：去掉逐实例__dict__，万条记忆规模下显著降低内存
+@dataclass(slots=True)
 class Memory:
     """记忆对象"""
     memory_id: str  # 记忆ID
@@ -39,30 +94,29 @@ class Memory:
     emotions: List[Dict[str, Any]] = field(default_factory=list)  # 情感标签
     concepts: List[Dict[str, Any]] = field(default_factory=list)  # 概念标签
 
+    def __post_init__(self):
+        # 构造时一次性规整情感/概念数据，
+        # 此后to_dict可以直接输出内部列表，序列化路径零逐元素转换
+        if self.emotions:
+            self.emotions = _normalize_emotions(self.emotions)
+        if self.concepts:
+            self.concepts = _normalize_concepts(self.concepts)
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         try:
             return {
+                # 模式版本2：时间戳存epoch秒，重载时免去ISO字符串解析
+                "_v": 2,
                 "memory_id": self.memory_id,
                 "content": self.content,
-                "timestamp": self.timestamp.isoformat(),
+                "timestamp": self.timestamp.timestamp(),
                 "importance_score": float(self.importance_score),  # 确保是浮点数
                 "context": self.context,
                 "conversation_id": self.conversation_id,
                 "memory_type": self.memory_type,
-                "emotions": [
-                    {
-                        "type": str(e.get("type", "")),
-                        "intensity": float(e.get("intensity", 0.0))
-                    } for e in self.emotions
-                ] if self.emotions else [],
-                "concepts": [
-                    {
-                        "name": str(c.get("name", "")),
-                        "type": str(c.get("type", "")),
-                        "relevance": float(c.get("relevance", 0.0))
-                    } for c in self.concepts
-                ] if self.concepts else []
+                "emotions": self.emotions,
+                "concepts": self.concepts
             }
         except Exception as e:
             memory_logger.error(f"记忆序列化失败: {str(e)}")
@@ -70,67 +124,84 @@ class Memory:
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Memory":
-        """从字典创建对象"""
+        """从字典创建对象
+
+        逐字段提取而不是复制整个输入字典再cls(**data)：
+        省掉每条记忆一次字典拷贝，未知键（如_v、子类扩展字段）被忽略
+        """
         try:
-            # 复制数据以避免修改原始数据
-            data = data.copy()
-            
-            # 转换时间戳
-            if isinstance(data.get("timestamp"), str):
-                data["timestamp"] = datetime.fromisoformat(data["timestamp"])
-            
+            # 转换时间戳：epoch数值优先（v2格式），ISO字符串作为旧数据回退
+            ts = data.get("timestamp")
+            if isinstance(ts, (int, float)):
+                ts = datetime.fromtimestamp(ts)
+            elif isinstance(ts, str):
+                ts = datetime.fromisoformat(ts)
+
             # 确保重要性分数是浮点数
-            if "importance_score" in data:
-                try:
-                    data["importance_score"] = float(data["importance_score"])
-                except (TypeError, ValueError):
-                    data["importance_score"] = 0.0
-            
-            # 处理情感数据
-            if "emotions" in data:
-                try:
-                    data["emotions"] = [
-                        {
-                            "type": str(e.get("type", "")),
-                            "intensity": float(e.get("intensity", 0.0))
-                        }
-                        for e in data["emotions"]
-                    ] if data["emotions"] else []
-                except Exception:
-                    data["emotions"] = []
-            
-            # 处理概念数据
-            if "concepts" in data:
-                try:
-                    data["concepts"] = [
-                        {
-                            "name": str(c.get("name", "")),
-                            "type": str(c.get("type", "")),
-                            "relevance": float(c.get("relevance", 0.0))
-                        }
-                        for c in data["concepts"]
-                    ] if data["concepts"] else []
-                except Exception:
-                    data["concepts"] = []
-            
-            # 确保context是字典
-            if not isinstance(data.get("context"), dict):
-                data["context"] = {}
-            
-            return cls(**data)
+            try:
+                importance = float(data.get("importance_score", 0.0))
+            except (TypeError, ValueError):
+                importance = 0.0
+
+            context = data.get("context")
+            emotions = data.get("emotions")
+            concepts = data.get("concepts")
+
+            return cls(
+                memory_id=data["memory_id"],
+                content=data["content"],
+                timestamp=ts,
+                importance_score=importance,
+                context=context if isinstance(context, dict) else {},
+                conversation_id=data.get("conversation_id"),
+                memory_type=data.get("memory_type"),
+                emotions=emotions if isinstance(emotions, list) else [],
+                concepts=concepts if isinstance(concepts, list) else []
+            )
             
         except Exception as e:
             memory_logger.error(f"从字典创建记忆对象失败: {str(e)}")
             raise MemoryException(f"从字典创建记忆对象失败: {str(e)}")
 
+    @classmethod
+    def from_trusted_dict(cls, data: Dict[str, Any]) -> "Memory":
+        """从可信字典快速创建对象
+
+        跳过__init__和__post_init__的规整校验，只适用于读取
+        本系统自身to_dict产物的批量加载路径；外部输入仍应走from_dict
+
+        Args:
+            data: to_dict产出的字典
+
+        Returns:
+            Memory: 记忆对象
+        """
+        obj = cls.__new__(cls)
+        obj.memory_id = data["memory_id"]
+        obj.content = data["content"]
+        ts = data["timestamp"]
+        if isinstance(ts, (int, float)):
+            ts = datetime.fromtimestamp(ts)
+        elif isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        obj.timestamp = ts
+        obj.importance_score = data["importance_score"]
+        obj.context = data.get("context") or {}
+        obj.conversation_id = data.get("conversation_id")
+        obj.memory_type = data.get("memory_type")
+        obj.emotions = data.get("emotions") or []
+        obj.concepts = data.get("concepts") or []
+        return obj
+
     def to_json(self) -> str:
-        return json.dumps(self.to_dict())
+        # orjson的C编码器直接输出UTF-8字节，比stdlib json快数倍
+        return orjson.dumps(self.to_dict()).decode()
 
     @classmethod
     def from_json(cls, json_str: str) -> 'Memory':
-        return cls.from_dict(json.loads(json_str))
+        return cls.from_dict(orjson.loads(json_str))
 
-@dataclass
+@dataclass(slots=True)
 class BaseSnapshot:
     """基础快照（Level 1）- 最抽象的分类层"""
     snapshot_id: str
@@ -146,15 +217,19 @@ class BaseSnapshot:
             "detail_snapshot_ids": self.detail_snapshot_ids
         }
 
-@dataclass
+@dataclass(slots=True)
 class DetailSnapshot:
-    """详细快照（Level 2）- 具体记忆的核心摘要"""
+    """详细快照（Level 2）- 具体记忆的核心摘要
+
+    timestamp槽允许先存ISO字符串：批量从磁盘加载时不逐条
+    fromisoformat，首次真正访问该属性时才解析并缓存回槽里
+    """
     snapshot_id: str
     summary: str  # 核心摘要
     key_elements: List[str]  # 关键要素
     emotion_tags: List[str]  # 情感标签
     memory_ids: List[str]  # 关联的完整记忆ID列表
-    timestamp: datetime  # 最近更新时间
+    timestamp: datetime  # 最近更新时间（可传ISO字符串，惰性解析）
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -166,6 +241,22 @@ class DetailSnapshot:
             "timestamp": self.timestamp.isoformat()
         }
 
+# 惰性时间戳：保留slots布局，用property包住原槽描述符，
+# 槽里是字符串时首次读取才解析，解析结果写回槽避免重复解析
+_detail_ts_slot = DetailSnapshot.timestamp
+
+def _detail_ts_get(self) -> datetime:
+    value = _detail_ts_slot.__get__(self, DetailSnapshot)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+        _detail_ts_slot.__set__(self, value)
+    return value
+
+DetailSnapshot.timestamp = property(
+    _detail_ts_get,
+    lambda self, value: _detail_ts_slot.__set__(self, value)
+)
+
 class MemoryStore(ABC):
     """记忆存储接口"""
     
@@ -4,11 +4,19 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Set
 from collections import defaultdict
+import heapq
 import json
+import numpy as np
 from .base import Memory, MemoryStore, MemoryStorageException
 
+# 重要性分数的衰减下限
+MIN_IMPORTANCE = 0.1
+
 class EpisodicMemory(Memory):
     """扩展的情节记忆类"""
+    # 基类已使用slots，这里显式声明新增属性，保持无__dict__的内存布局
+    __slots__ = ('related_memories', 'tags', 'decay_rate')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.related_memories: Set[str] = set()  # 相关记忆ID集合
@@ -26,9 +34,12 @@ class EpisodicMemory(Memory):
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EpisodicMemory':
+        # 基类from_dict只读取自己认识的字段，子类键在同一趟里补齐，
+        # 不再需要先剔除扩展字段再二次赋值的防御性拷贝
         memory = super().from_dict(data)
-        memory.related_memories = set(data.get("related_memories", []))
-        memory.tags = data.get("tags", [])
+        related = data.get("related_memories")
+        memory.related_memories = set(related) if related else set()
+        memory.tags = data.get("tags") or []
         memory.decay_rate = data.get("decay_rate", 0.1)
         return memory
 
@@ -46,8 +57,27 @@ class EpisodicMemoryStore(MemoryStore):
         super().__init__()
         self.max_size = max_size
         self.importance_threshold = importance_threshold
-        self.tag_index = defaultdict(set)  # 标签索引
-        self.temporal_index = defaultdict(list)  # 时间索引
+        self.memories: Dict[str, EpisodicMemory] = {}  # 记忆主存储
+        # 两个辅助索引惰性构建：空的或只做主键访问的存储不为它们付出分配
+        self._tag_index: Optional[Dict[str, Set[str]]] = None
+        self._temporal_index: Optional[Dict[int, Set[str]]] = None
+        # 标签索引的只读快照：写后失效，读多写少时避免每次查询
+        # 都在活动可变set上做交集
+        self._frozen_tag_index: Optional[Dict[str, frozenset]] = None
+
+    @property
+    def tag_index(self) -> Dict[str, Set[str]]:
+        """标签索引，首次访问时创建"""
+        if self._tag_index is None:
+            self._tag_index = defaultdict(set)
+        return self._tag_index
+
+    @property
+    def temporal_index(self) -> Dict[int, Set[str]]:
+        """时间索引，首次访问时创建"""
+        if self._temporal_index is None:
+            self._temporal_index = defaultdict(set)
+        return self._temporal_index
 
     def add(self, memory: EpisodicMemory) -> bool:
         """添加新的情节记忆"""
@@ -114,9 +144,7 @@ class EpisodicMemoryStore(MemoryStore):
 
             if filters:
                 if "tags" in filters:
-                    tag_memories = set.intersection(
-                        *[self.tag_index[tag] for tag in filters["tags"]]
-                    )
+                    tag_memories = self._match_tags(filters["tags"])
                     memories = [m for m in memories if m.memory_id in tag_memories]
 
                 if "start_time" in filters:
@@ -128,59 +156,121 @@ class EpisodicMemoryStore(MemoryStore):
                 if "min_importance" in filters:
                     memories = [m for m in memories if m.importance_score >= filters["min_importance"]]
 
-            # 更新所有记忆的重要性分数
-            for memory in memories:
-                self._update_importance(memory)
-
-            # 按重要性分数降序排序
-            memories.sort(key=lambda x: x.importance_score, reverse=True)
+            # 批量更新所有记忆的重要性分数（向量化的时间衰减）
+            decayed = self._update_importance_batch(memories)
 
-            return memories
+            # 按衰减后分数降序：直接对刚算出的分数数组argsort，
+            # 不必再逐条回读importance_score属性做key比较
+            if decayed is None:
+                return memories
+            return [memories[i] for i in np.argsort(-decayed)]
         except Exception as e:
             raise MemoryStorageException(f"列出情节记忆失败: {str(e)}")
 
+    def _match_tags(self, tags: List[str]) -> frozenset:
+        """求同时命中所有标签的记忆ID集合
+
+        在冻结的标签索引快照上求交集，并按桶大小升序排列，
+        最小的桶作为交集种子使中间结果尽早收敛
+        """
+        if self._frozen_tag_index is None:
+            self._frozen_tag_index = {
+                tag: frozenset(ids)
+                for tag, ids in (self._tag_index or {}).items()
+            }
+
+        frozen = self._frozen_tag_index
+        buckets = sorted(
+            (frozen.get(tag, frozenset()) for tag in tags), key=len
+        )
+        if not buckets:
+            return frozenset()
+        return buckets[0].intersection(*buckets[1:])
+
     def _update_indices(self, memory: EpisodicMemory) -> None:
         """更新索引"""
+        self._frozen_tag_index = None
         # 更新标签索引
         for tag in memory.tags:
             self.tag_index[tag].add(memory.memory_id)
 
-        # 更新时间索引
-        date_key = memory.timestamp.strftime("%Y-%m-%d")
-        if memory.memory_id not in self.temporal_index[date_key]:
-            self.temporal_index[date_key].append(memory.memory_id)
+        # 更新时间索引：键用整数序数日而不是strftime字符串，
+        # toordinal是C方法且不产生字符串分配；桶是set，add自带去重
+        date_key = memory.timestamp.toordinal()
+        self.temporal_index[date_key].add(memory.memory_id)
 
     def _remove_from_indices(self, memory: EpisodicMemory) -> None:
         """从索引中移除"""
+        self._frozen_tag_index = None
         # 从标签索引中移除
         for tag in memory.tags:
             self.tag_index[tag].discard(memory.memory_id)
 
         # 从时间索引中移除
-        date_key = memory.timestamp.strftime("%Y-%m-%d")
-        if memory.memory_id in self.temporal_index[date_key]:
-            self.temporal_index[date_key].remove(memory.memory_id)
+        date_key = memory.timestamp.toordinal()
+        self.temporal_index[date_key].discard(memory.memory_id)
+
+    def _update_importance(self, memory: EpisodicMemory, now: Optional[datetime] = None) -> None:
+        """更新重要性分数（考虑时间衰减）
 
-    def _update_importance(self, memory: EpisodicMemory) -> None:
-        """更新重要性分数（考虑时间衰减）"""
-        days_passed = (datetime.now() - memory.timestamp).days
+        Args:
+            memory: 待更新的记忆
+            now: 当前时间；批量调用方传入同一时刻，避免逐条读时钟
+        """
+        days_passed = ((now or datetime.now()) - memory.timestamp).days
         decay = memory.decay_rate * days_passed
-        memory.importance_score = max(0.1, memory.importance_score - decay)
+        memory.importance_score = max(MIN_IMPORTANCE, memory.importance_score - decay)
+
+    def _update_importance_batch(self, memories: List[EpisodicMemory]) -> Optional[np.ndarray]:
+        """批量更新重要性分数，返回衰减后的分数数组
+
+        衰减算术在NumPy数组上一次完成：N条记忆只取一次当前时间，
+        减法和下限裁剪是C级向量运算，替代逐条的Python算术。
+        返回的数组与输入顺序对齐，调用方可直接用于排序
+        """
+        count = len(memories)
+        if not count:
+            return None
+
+        now_ts = datetime.now().timestamp()
+        ts = np.fromiter(
+            (m.timestamp.timestamp() for m in memories),
+            dtype=np.float64, count=count
+        )
+        rates = np.fromiter(
+            (m.decay_rate for m in memories), dtype=np.float64, count=count
+        )
+        scores = np.fromiter(
+            (m.importance_score for m in memories), dtype=np.float64, count=count
+        )
+
+        # 与单条路径一致：按整天数衰减
+        days = np.floor((now_ts - ts) / 86400.0)
+        decayed = np.maximum(MIN_IMPORTANCE, scores - rates * days)
+
+        for memory, score in zip(memories, decayed.tolist()):
+            memory.importance_score = score
+
+        return decayed
 
     def _cleanup_unimportant(self) -> None:
         """清理不重要的记忆"""
         if not self.memories:
             return
 
-        # 按重要性分数排序
-        memories_by_importance = sorted(
+        # 只取最不重要的前k条候选（O(N log k)），
+        # 不必为淘汰少量记忆对全量做O(N log N)排序
+        k = max(16, len(self.memories) - self.max_size + 1)
+        eviction_candidates = heapq.nsmallest(
+            k,
             self.memories.items(),
             key=lambda x: x[1].importance_score
         )
 
         # 移除最不重要的记忆，直到低于最大容量
-        while len(self.memories) >= self.max_size:
-            memory_id, memory = memories_by_importance.pop(0)
+        for memory_id, memory in eviction_candidates:
+            if len(self.memories) < self.max_size:
+                break
             if memory.importance_score < self.importance_threshold:
                 self.delete(memory_id)
             else:
@@ -188,13 +278,17 @@ class EpisodicMemoryStore(MemoryStore):
 
     def get_stats(self) -> Dict[str, Any]:
         """获取存储统计信息"""
+        # 直接读底层字段，统计不强制实例化惰性索引
+        tag_index = self._tag_index or {}
+        temporal_index = self._temporal_index or {}
         return {
             "total_memories": len(self.memories),
             "max_size": self.max_size,
             "importance_threshold": self.importance_threshold,
-            "total_tags": len(self.tag_index),
+            "total_tags": len(tag_index),
             "memories_by_date": {
-                date: len(memories) 
-                for date, memories in self.temporal_index.items()
+                # 序数日键只在报表输出时还原为日期字符串
+                datetime.fromordinal(ordinal).date().isoformat(): len(memories)
+                for ordinal, memories in temporal_index.items()
             }
         }
\ No newline at end of file
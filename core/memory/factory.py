@@ -1,8 +1,9 @@
 """
 记忆系统工厂模块
 """
+import asyncio
 import os
-import json
+import orjson
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -14,6 +15,30 @@ from utils.logger import get_logger
 # 创建logger
 memory_factory_logger = get_logger('memory_factory')
 
+# 默认的LLM配置文件路径
+LLM_CONFIG_PATH = str(Path(__file__).parent.parent.parent / 'config' / 'llm_config.json')
+
+def _read_llm_config_file() -> Optional[Dict[str, Any]]:
+    """阻塞地读取并解析LLM配置文件（在线程中执行）"""
+    if not os.path.exists(LLM_CONFIG_PATH):
+        return None
+    with open(LLM_CONFIG_PATH, 'rb') as f:
+        return orjson.loads(f.read())
+
+async def _load_llm_config() -> Optional[Dict[str, Any]]:
+    """从默认路径加载LLM配置，文件不存在时返回None
+
+    磁盘读取放到线程中执行，工厂在事件循环上被调用时不会
+    因为配置文件I/O阻塞其他协程
+    """
+    memory_factory_logger.info(f"尝试加载 LLM 配置文件: {LLM_CONFIG_PATH}")
+    loaded = await asyncio.to_thread(_read_llm_config_file)
+    if loaded is None:
+        memory_factory_logger.warning(f"LLM 配置文件不存在: {LLM_CONFIG_PATH}")
+    else:
+        memory_factory_logger.info(f"成功加载 LLM 配置: {loaded}")
+    return loaded
+
 class MemorySystemFactory:
     """记忆系统工厂"""
     
@@ -34,17 +59,9 @@ class MemorySystemFactory:
             storage = MemoryStorage()
             memory_factory_logger.info("存储初始化完成")
             
-            # 加载 LLM 配置
-            llm_config_path = str(Path(__file__).parent.parent.parent / 'config' / 'llm_config.json')
-            memory_factory_logger.info(f"尝试加载 LLM 配置文件: {llm_config_path}")
-            
-            if os.path.exists(llm_config_path):
-                with open(llm_config_path, 'r') as f:
-                    loaded_llm_config = json.load(f)
-                memory_factory_logger.info(f"成功加载 LLM 配置: {loaded_llm_config}")
-                llm_config = loaded_llm_config
-            else:
-                memory_factory_logger.warning(f"LLM 配置文件不存在: {llm_config_path}")
+            # 加载 LLM 配置：调用方显式传入配置时不再读配置文件
+            if llm_config is None:
+                llm_config = await _load_llm_config()
             
             # 创建LLM服务
             memory_factory_logger.info(f"创建 LLM 服务，使用配置: {llm_config or {}}")
@@ -1,15 +1,63 @@
 """
 基于文件系统的记忆存储实现
+
+记忆主体和关联索引存放在单个SQLite库（WAL模式）里：
+旧实现每条记忆一个JSON文件，list/get_working_memories要对全目录
+逐个open+stat+json.load，系统调用开销随记忆数线性放大；
+单库方案把上千次文件读取折叠成一条带索引的查询。
+快照内容仍按文件存放，旧版JSON目录树只在首次启动时做一次性迁移。
 """
 import os
-import json
+import asyncio
+import shutil
+import sqlite3
+import orjson
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Set
+from collections import OrderedDict
 from pathlib import Path
 
 from .base import Memory, MemoryStore, BaseSnapshot, DetailSnapshot, MemoryStorageException
 from utils.logger import memory_logger
 
+def _dump(path: Path, obj: Any) -> None:
+    """以缩进JSON字节写入文件：orjson的C编码器直接产出UTF-8"""
+    path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+def _load(path: Path) -> Any:
+    """读取并解析JSON文件"""
+    return orjson.loads(path.read_bytes())
+
+# 反序列化结果缓存容量：热点记忆的重复get命中纯字典查找
+_CACHE_MAX = 4096
+
+# 详细快照关键要素的数量上限，到达后停止继续分词
+_KEY_ELEMENTS_MAX = 1024
+
+# 迁移扫描的解码线程数：读系统调用和orjson解码互相重叠，
+# 上限8避免文件描述符抖动
+_SCAN_WORKERS = min(8, os.cpu_count() or 1)
+
+def _scan_json(directory: Path) -> List[Path]:
+    """列出目录下的JSON文件
+
+    直接走os.scandir：比Path.glob少一层fnmatch匹配和逐项PurePath构造
+    """
+    return [
+        Path(entry.path)
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(".json")
+    ]
+
+def _load_many(paths: List[Path]) -> List[Any]:
+    """并行读取并解析一批JSON文件，保持输入顺序"""
+    if len(paths) <= 1:
+        return [_load(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=_SCAN_WORKERS) as pool:
+        return list(pool.map(_load, paths))
+
 class FileMemoryStore(MemoryStore):
     """基于文件系统的记忆存储"""
     
@@ -21,38 +69,146 @@ class FileMemoryStore(MemoryStore):
         """
         self.base_dir = Path(base_dir)
         
-        # 记忆存储目录
+        # 旧版记忆/索引目录：只作为一次性迁移的来源保留
         self.memories_dir = self.base_dir / "memories"
+        self.index_dir = self.base_dir / "indexes"
+        self.memory_snapshot_index_dir = self.index_dir / "memory_snapshots"
+        self.snapshot_memory_index_dir = self.index_dir / "snapshot_memories"
         
         # 快照存储目录
         self.snapshots_dir = self.base_dir / "snapshots"
         self.base_snapshots_dir = self.snapshots_dir / "base"
         self.detail_snapshots_dir = self.snapshots_dir / "detail"
         
-        # 索引存储目录
-        self.index_dir = self.base_dir / "indexes"
-        self.memory_snapshot_index_dir = self.index_dir / "memory_snapshots"
-        self.snapshot_memory_index_dir = self.index_dir / "snapshot_memories"
-        
         # 创建必要的目录
         for dir_path in [
-            self.memories_dir,
             self.snapshots_dir,
             self.base_snapshots_dir,
-            self.detail_snapshots_dir,
-            self.index_dir,
-            self.memory_snapshot_index_dir,
-            self.snapshot_memory_index_dir
+            self.detail_snapshots_dir
         ]:
             dir_path.mkdir(parents=True, exist_ok=True)
         
+        # 打开SQLite库：WAL模式允许读写并发，synchronous=NORMAL
+        # 在WAL下仍保证库内一致性，且每次提交省掉一次fsync
+        self.db_path = self.base_dir / "store.db"
+        self._db = sqlite3.connect(
+            str(self.db_path), isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS memories(
+                id TEXT PRIMARY KEY,
+                ts REAL,
+                importance REAL,
+                data BLOB
+            );
+            CREATE INDEX IF NOT EXISTS idx_memories_ts
+                ON memories(ts DESC);
+            CREATE INDEX IF NOT EXISTS idx_memories_importance
+                ON memories(importance DESC);
+            CREATE TABLE IF NOT EXISTS memory_snapshot(
+                memory_id TEXT,
+                snapshot_id TEXT,
+                PRIMARY KEY(memory_id, snapshot_id)
+            );
+            CREATE TABLE IF NOT EXISTS base_detail(
+                base_id TEXT,
+                detail_id TEXT,
+                PRIMARY KEY(base_id, detail_id)
+            );
+        """)
+        
+        # 反序列化缓存：memory_id -> Memory，LRU淘汰
+        self._mem_cache: "OrderedDict[str, Memory]" = OrderedDict()
+        
+        # 异步调用方的落盘执行器：单线程既把阻塞写挪出事件循环，
+        # 又保证SQLite连接始终只被同一个工作线程串行访问
+        # （与memory_storage的单线程DB执行器同一套路）
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="file_store_io"
+        )
+        
         memory_logger.info(f"初始化文件存储: {base_dir}")
         
         # 加载索引
         self._load_indexes()
     
+    @staticmethod
+    def _memory_row(memory: Memory) -> tuple:
+        """把记忆对象编码为memories表的一行"""
+        data = memory.to_dict()
+        return (
+            memory.memory_id,
+            data["timestamp"],
+            data["importance_score"],
+            orjson.dumps(data)
+        )
+    
+    def _retire_legacy_dir(self, path: Path) -> None:
+        """把已导入的旧版目录挪到一旁，防止清库重启后被再次导入"""
+        try:
+            target = path.with_name(path.name + ".migrated")
+            if target.exists():
+                shutil.rmtree(target)
+            path.rename(target)
+        except OSError as e:
+            memory_logger.error(f"归档旧版目录失败: {path}: {str(e)}")
+    
+    def _migrate_legacy_files(self):
+        """旧版逐文件JSON树的一次性迁移：各表为空且旧目录存在时执行
+
+        导入成功后旧目录改名为*.migrated归档——否则clear_all_memories
+        清空表后下次启动会把已删除的旧记忆重新导入
+        """
+        count = self._db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+        if count == 0 and self.memories_dir.is_dir():
+            rows = [
+                self._memory_row(Memory.from_dict(data))
+                for data in _load_many(_scan_json(self.memories_dir))
+            ]
+            if rows:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO memories VALUES (?,?,?,?)", rows
+                )
+                self._db.execute("COMMIT")
+                memory_logger.info(f"迁移旧版记忆文件: {len(rows)}条")
+            self._retire_legacy_dir(self.memories_dir)
+        
+        count = self._db.execute("SELECT COUNT(*) FROM memory_snapshot").fetchone()[0]
+        if count == 0 and self.memory_snapshot_index_dir.is_dir():
+            pairs = []
+            paths = _scan_json(self.memory_snapshot_index_dir)
+            for file_path, snapshot_ids in zip(paths, _load_many(paths)):
+                memory_id = file_path.stem
+                pairs.extend((memory_id, sid) for sid in snapshot_ids)
+            if pairs:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO memory_snapshot VALUES (?,?)", pairs
+                )
+                self._db.execute("COMMIT")
+                memory_logger.info(f"迁移旧版记忆-快照索引: {len(pairs)}条")
+            self._retire_legacy_dir(self.index_dir)
+        
+        count = self._db.execute("SELECT COUNT(*) FROM base_detail").fetchone()[0]
+        if count == 0 and self.base_snapshots_dir.is_dir():
+            pairs = []
+            for data in _load_many(_scan_json(self.base_snapshots_dir)):
+                pairs.extend(
+                    (data["snapshot_id"], did)
+                    for did in data["detail_snapshot_ids"]
+                )
+            if pairs:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO base_detail VALUES (?,?)", pairs
+                )
+                self._db.execute("COMMIT")
+    
     def _load_indexes(self):
-        """加载索引"""
+        """加载索引：从SQLite表整体读入内存映射"""
         try:
             # 记忆ID -> 快照ID的映射
             self.memory_snapshot_index: Dict[str, Set[str]] = {}
@@ -63,23 +219,18 @@ class FileMemoryStore(MemoryStore):
             # 基础快照ID -> 详细快照ID的映射
             self.base_detail_index: Dict[str, Set[str]] = {}
             
-            # 加载记忆-快照索引
-            for file_path in self.memory_snapshot_index_dir.glob("*.json"):
-                memory_id = file_path.stem
-                with open(file_path, "r", encoding="utf-8") as f:
-                    self.memory_snapshot_index[memory_id] = set(json.load(f))
+            self._migrate_legacy_files()
             
-            # 加载快照-记忆索引
-            for file_path in self.snapshot_memory_index_dir.glob("*.json"):
-                snapshot_id = file_path.stem
-                with open(file_path, "r", encoding="utf-8") as f:
-                    self.snapshot_memory_index[snapshot_id] = set(json.load(f))
+            for memory_id, snapshot_id in self._db.execute(
+                "SELECT memory_id, snapshot_id FROM memory_snapshot"
+            ):
+                self.memory_snapshot_index.setdefault(memory_id, set()).add(snapshot_id)
+                self.snapshot_memory_index.setdefault(snapshot_id, set()).add(memory_id)
             
-            # 加载基础快照索引
-            for file_path in self.base_snapshots_dir.glob("*.json"):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.base_detail_index[data["snapshot_id"]] = set(data["detail_snapshot_ids"])
+            for base_id, detail_id in self._db.execute(
+                "SELECT base_id, detail_id FROM base_detail"
+            ):
+                self.base_detail_index.setdefault(base_id, set()).add(detail_id)
             
             memory_logger.info("索引加载完成")
             
@@ -90,33 +241,75 @@ class FileMemoryStore(MemoryStore):
     def _save_memory_snapshot_index(self, memory_id: str):
         """保存记忆-快照索引"""
         try:
-            file_path = self.memory_snapshot_index_dir / f"{memory_id}.json"
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(list(self.memory_snapshot_index.get(memory_id, set())), f)
+            pairs = [
+                (memory_id, sid)
+                for sid in self.memory_snapshot_index.get(memory_id, set())
+            ]
+            if pairs:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO memory_snapshot VALUES (?,?)", pairs
+                )
         except Exception as e:
             memory_logger.error(f"保存记忆-快照索引失败: {str(e)}")
     
     def _save_snapshot_memory_index(self, snapshot_id: str):
         """保存快照-记忆索引"""
         try:
-            file_path = self.snapshot_memory_index_dir / f"{snapshot_id}.json"
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(list(self.snapshot_memory_index.get(snapshot_id, set())), f)
+            pairs = [
+                (mid, snapshot_id)
+                for mid in self.snapshot_memory_index.get(snapshot_id, set())
+            ]
+            if pairs:
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO memory_snapshot VALUES (?,?)", pairs
+                )
         except Exception as e:
             memory_logger.error(f"保存快照-记忆索引失败: {str(e)}")
     
+    async def _run_io(self, func, *args):
+        """在共享IO线程上执行阻塞的存储操作"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._io_pool, func, *args
+        )
+    
+    async def add_async(self, memory: Memory) -> bool:
+        """add的异步变体：写盘期间不阻塞事件循环"""
+        return await self._run_io(self.add, memory)
+    
+    async def create_detail_snapshot_async(self, memories: List[Memory]) -> DetailSnapshot:
+        """create_detail_snapshot的异步变体"""
+        return await self._run_io(self.create_detail_snapshot, memories)
+    
+    async def create_base_snapshot_async(self, detail_snapshots: List[DetailSnapshot]) -> BaseSnapshot:
+        """create_base_snapshot的异步变体"""
+        return await self._run_io(self.create_base_snapshot, detail_snapshots)
+    
+    def close(self) -> None:
+        """关闭IO执行器和数据库连接"""
+        self._io_pool.shutdown(wait=True)
+        self._db.close()
+    
+    def _cache_put(self, memory: Memory) -> None:
+        """写入反序列化缓存并按LRU淘汰"""
+        self._mem_cache[memory.memory_id] = memory
+        self._mem_cache.move_to_end(memory.memory_id)
+        if len(self._mem_cache) > _CACHE_MAX:
+            self._mem_cache.popitem(last=False)
+    
     def add(self, memory: Memory) -> bool:
         """添加记忆"""
         try:
             # 保存记忆
-            file_path = self.memories_dir / f"{memory.memory_id}.json"
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(memory.to_dict(), f, ensure_ascii=False, indent=2)
+            self._db.execute(
+                "INSERT OR REPLACE INTO memories VALUES (?,?,?,?)",
+                self._memory_row(memory)
+            )
+            # 写入方就是最权威的对象，直接入缓存
+            self._cache_put(memory)
             
             # 初始化索引
             if memory.memory_id not in self.memory_snapshot_index:
                 self.memory_snapshot_index[memory.memory_id] = set()
-                self._save_memory_snapshot_index(memory.memory_id)
             
             return True
         except Exception as e:
@@ -126,26 +319,32 @@ class FileMemoryStore(MemoryStore):
     def get(self, memory_id: str) -> Optional[Memory]:
         """获取指定记忆"""
         try:
-            file_path = self.memories_dir / f"{memory_id}.json"
-            if not file_path.exists():
+            # 命中缓存时不触碰数据库和解码器
+            memory = self._mem_cache.get(memory_id)
+            if memory is not None:
+                self._mem_cache.move_to_end(memory_id)
+                return memory
+            
+            row = self._db.execute(
+                "SELECT data FROM memories WHERE id=?", (memory_id,)
+            ).fetchone()
+            if row is None:
                 return None
-            
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return Memory.from_dict(data)
+            # 行数据是本store自己写入的to_dict产物，走免校验的快速反序列化
+            memory = Memory.from_trusted_dict(orjson.loads(row[0]))
+            self._cache_put(memory)
+            return memory
         except Exception as e:
             memory_logger.error(f"获取记忆失败: {str(e)}")
             return None
     
     def list(self) -> List[Memory]:
         """列出所有记忆"""
-        memories = []
         try:
-            for file_path in self.memories_dir.glob("*.json"):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                memories.append(Memory.from_dict(data))
-            return memories
+            return [
+                Memory.from_trusted_dict(orjson.loads(row[0]))
+                for row in self._db.execute("SELECT data FROM memories")
+            ]
         except Exception as e:
             memory_logger.error(f"列出记忆失败: {str(e)}")
             return []
@@ -153,27 +352,21 @@ class FileMemoryStore(MemoryStore):
     def delete(self, memory_id: str) -> bool:
         """删除记忆"""
         try:
-            # 删除记忆文件
-            file_path = self.memories_dir / f"{memory_id}.json"
-            if file_path.exists():
-                file_path.unlink()
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM memories WHERE id=?", (memory_id,))
+            self._db.execute(
+                "DELETE FROM memory_snapshot WHERE memory_id=?", (memory_id,)
+            )
+            self._db.execute("COMMIT")
             
-            # 更新索引
+            self._mem_cache.pop(memory_id, None)
+            
+            # 更新内存索引
             if memory_id in self.memory_snapshot_index:
-                # 获取关联的快照
-                snapshot_ids = self.memory_snapshot_index[memory_id]
-                
-                # 从快照-记忆索引中删除
-                for snapshot_id in snapshot_ids:
+                for snapshot_id in self.memory_snapshot_index[memory_id]:
                     if snapshot_id in self.snapshot_memory_index:
                         self.snapshot_memory_index[snapshot_id].discard(memory_id)
-                        self._save_snapshot_memory_index(snapshot_id)
-                
-                # 删除记忆-快照索引
                 del self.memory_snapshot_index[memory_id]
-                index_path = self.memory_snapshot_index_dir / f"{memory_id}.json"
-                if index_path.exists():
-                    index_path.unlink()
             
             return True
         except Exception as e:
@@ -186,13 +379,11 @@ class FileMemoryStore(MemoryStore):
     
     def get_base_snapshots(self) -> List[BaseSnapshot]:
         """获取所有基础快照"""
-        snapshots = []
         try:
-            for file_path in self.base_snapshots_dir.glob("*.json"):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                snapshots.append(BaseSnapshot(**data))
-            return snapshots
+            return [
+                BaseSnapshot(**data)
+                for data in _load_many(_scan_json(self.base_snapshots_dir))
+            ]
         except Exception as e:
             memory_logger.error(f"获取基础快照失败: {str(e)}")
             return []
@@ -208,10 +399,8 @@ class FileMemoryStore(MemoryStore):
             for snapshot_id in detail_ids:
                 file_path = self.detail_snapshots_dir / f"{snapshot_id}.json"
                 if file_path.exists():
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
-                    snapshots.append(DetailSnapshot(**data))
+                    # ISO字符串原样传入，DetailSnapshot按需惰性解析
+                    snapshots.append(DetailSnapshot(**_load(file_path)))
             
             return snapshots
         except Exception as e:
@@ -219,13 +408,38 @@ class FileMemoryStore(MemoryStore):
             return []
     
     def get_memories_by_ids(self, memory_ids: List[str]) -> List[Memory]:
-        """根据ID列表批量获取记忆"""
-        memories = []
-        for memory_id in memory_ids:
-            memory = self.get(memory_id)
-            if memory:
-                memories.append(memory)
-        return memories
+        """根据ID列表批量获取记忆
+
+        缓存未命中的ID合并成一条IN查询整批取回，而不是逐ID各发一次
+        查询；结果按调用方传入的ID顺序返回
+        """
+        try:
+            found: Dict[str, Memory] = {}
+            missing: List[str] = []
+            for memory_id in memory_ids:
+                memory = self._mem_cache.get(memory_id)
+                if memory is not None:
+                    self._mem_cache.move_to_end(memory_id)
+                    found[memory_id] = memory
+                else:
+                    missing.append(memory_id)
+            
+            # 每批最多500个占位符，避开SQLite的绑定变量上限
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for memory_id, blob in self._db.execute(
+                    f"SELECT id, data FROM memories WHERE id IN ({placeholders})",
+                    batch
+                ):
+                    memory = Memory.from_trusted_dict(orjson.loads(blob))
+                    self._cache_put(memory)
+                    found[memory_id] = memory
+            
+            return [found[mid] for mid in memory_ids if mid in found]
+        except Exception as e:
+            memory_logger.error(f"批量获取记忆失败: {str(e)}")
+            return []
     
     def create_detail_snapshot(self, memories: List[Memory]) -> DetailSnapshot:
         """从记忆列表创建详细快照"""
@@ -233,42 +447,51 @@ class FileMemoryStore(MemoryStore):
             # 生成快照ID
             snapshot_id = f"detail_{datetime.now().strftime('%Y%m%d%H%M%S')}"
             
-            # 提取关键信息
+            # 提取关键信息：单趟循环直接聚到set里，
+            # islice取前10个词免去切片的中间列表，情感标签也不再
+            # 先攒中间list再去重
             memory_contents = [m.content for m in memories]
-            memory_emotions = []
-            for m in memories:
-                for e in m.emotions:
-                    if isinstance(e, dict) and 'type' in e:
-                        memory_emotions.append(e['type'])
             memory_ids = [m.memory_id for m in memories]
             
+            key_elements = set()
+            for content in memory_contents:
+                key_elements.update(islice(content.split(), 10))
+                if len(key_elements) > _KEY_ELEMENTS_MAX:
+                    break
+            
+            emotion_tags = {
+                e['type']
+                for m in memories
+                for e in m.emotions
+                if isinstance(e, dict) and 'type' in e
+            }
+            
             # 创建快照
             snapshot = DetailSnapshot(
                 snapshot_id=snapshot_id,
                 summary="\n".join(memory_contents[:3]),  # 简单示例,实际应该用LLM生成摘要
-                key_elements=list(set(word for content in memory_contents 
-                                    for word in content.split()[:10])),  # 简单示例
-                emotion_tags=list(set(memory_emotions)),
+                # 排序固定落盘顺序：同样的输入总是产出同样的JSON字节，
+                # 内容寻址/去重才有意义（set迭代顺序受哈希随机化影响）
+                key_elements=sorted(key_elements),  # 简单示例
+                emotion_tags=sorted(emotion_tags),
                 memory_ids=memory_ids,
                 timestamp=datetime.now()
             )
             
             # 保存快照
-            file_path = self.detail_snapshots_dir / f"{snapshot_id}.json"
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(snapshot.to_dict(), f, ensure_ascii=False, indent=2)
+            _dump(self.detail_snapshots_dir / f"{snapshot_id}.json", snapshot.to_dict())
             
-            # 更新索引
+            # 更新索引：K条记忆的关联边收集后一次executemany落库，
+            # 单事务内提交，fsync在所有行间摊销
             for memory_id in memory_ids:
-                if memory_id not in self.memory_snapshot_index:
-                    self.memory_snapshot_index[memory_id] = set()
-                self.memory_snapshot_index[memory_id].add(snapshot_id)
-                self._save_memory_snapshot_index(memory_id)
-            
-            if snapshot_id not in self.snapshot_memory_index:
-                self.snapshot_memory_index[snapshot_id] = set()
-            self.snapshot_memory_index[snapshot_id].update(memory_ids)
-            self._save_snapshot_memory_index(snapshot_id)
+                self.memory_snapshot_index.setdefault(memory_id, set()).add(snapshot_id)
+            self.snapshot_memory_index.setdefault(snapshot_id, set()).update(memory_ids)
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO memory_snapshot VALUES (?,?)",
+                [(memory_id, snapshot_id) for memory_id in memory_ids]
+            )
+            self._db.execute("COMMIT")
             
             return snapshot
             
@@ -293,17 +516,19 @@ class FileMemoryStore(MemoryStore):
             snapshot = BaseSnapshot(
                 snapshot_id=snapshot_id,
                 category="自动分类",  # 简单示例,实际应该用LLM生成分类
-                keywords=list(set(all_key_elements)),
+                keywords=sorted(set(all_key_elements)),
                 detail_snapshot_ids=detail_snapshot_ids
             )
             
             # 保存快照
-            file_path = self.base_snapshots_dir / f"{snapshot_id}.json"
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(snapshot.to_dict(), f, ensure_ascii=False, indent=2)
+            _dump(self.base_snapshots_dir / f"{snapshot_id}.json", snapshot.to_dict())
             
             # 更新索引
             self.base_detail_index[snapshot_id] = set(detail_snapshot_ids)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO base_detail VALUES (?,?)",
+                [(snapshot_id, did) for did in detail_snapshot_ids]
+            )
             
             return snapshot
             
@@ -331,10 +556,13 @@ class FileMemoryStore(MemoryStore):
     def get_working_memories(self) -> List[Memory]:
         """获取工作记忆"""
         try:
-            memories = self.list()
-            # 按时间戳排序，返回最近的10条记忆
-            memories.sort(key=lambda m: m.timestamp, reverse=True)
-            return memories[:10]
+            # 时间索引上的top-10查询，只解码命中的10条
+            return [
+                Memory.from_trusted_dict(orjson.loads(row[0]))
+                for row in self._db.execute(
+                    "SELECT data FROM memories ORDER BY ts DESC LIMIT 10"
+                )
+            ]
         except Exception as e:
             memory_logger.error(f"获取工作记忆失败: {str(e)}")
             return []
@@ -342,10 +570,13 @@ class FileMemoryStore(MemoryStore):
     def get_episodic_memories(self) -> List[Memory]:
         """获取情节记忆"""
         try:
-            memories = self.list()
-            # 按重要性分数排序
-            memories.sort(key=lambda m: m.importance_score, reverse=True)
-            return memories
+            # 排序下推到importance索引，免去Python侧全量排序
+            return [
+                Memory.from_trusted_dict(orjson.loads(row[0]))
+                for row in self._db.execute(
+                    "SELECT data FROM memories ORDER BY importance DESC"
+                )
+            ]
         except Exception as e:
             memory_logger.error(f"获取情节记忆失败: {str(e)}")
             return []
@@ -374,26 +605,35 @@ class FileMemoryStore(MemoryStore):
     def clear_all_memories(self) -> bool:
         """清空所有记忆"""
         try:
-            # 删除所有记忆文件
-            for file_path in self.memories_dir.glob("*.json"):
-                file_path.unlink()
-            
-            # 清空索引
+            # 清空数据库各表
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM memories")
+            self._db.execute("DELETE FROM memory_snapshot")
+            self._db.execute("DELETE FROM base_detail")
+            self._db.execute("COMMIT")
+            
+            # 清空索引和缓存
+            self._mem_cache.clear()
             self.memory_snapshot_index.clear()
             self.snapshot_memory_index.clear()
             self.base_detail_index.clear()
             
-            # 删除所有索引文件
-            for file_path in self.memory_snapshot_index_dir.glob("*.json"):
-                file_path.unlink()
-            for file_path in self.snapshot_memory_index_dir.glob("*.json"):
-                file_path.unlink()
-            
-            # 删除所有快照文件
-            for file_path in self.base_snapshots_dir.glob("*.json"):
-                file_path.unlink()
-            for file_path in self.detail_snapshots_dir.glob("*.json"):
-                file_path.unlink()
+            # 删除所有快照文件：裸scandir条目直接unlink，
+            # 不为每个文件构造PurePath对象
+            for directory in (self.base_snapshots_dir, self.detail_snapshots_dir):
+                for entry in os.scandir(directory):
+                    if entry.is_file() and entry.name.endswith(".json"):
+                        os.unlink(entry.path)
+            
+            # 连同旧版来源一起删除，重启后的迁移不会复活已清空的数据
+            for legacy in (
+                self.memories_dir,
+                self.index_dir,
+                self.memories_dir.with_name(self.memories_dir.name + ".migrated"),
+                self.index_dir.with_name(self.index_dir.name + ".migrated"),
+            ):
+                if legacy.is_dir():
+                    shutil.rmtree(legacy, ignore_errors=True)
                 
             return True
         except Exception as e:
@@ -3,6 +3,7 @@
 """
 import os
 import asyncio
+import itertools
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from core.retrieval.vector_store import VectorStore
@@ -12,6 +13,9 @@ from utils.logger import get_logger
 
 memory_logger = get_logger('memory_manager')
 
+# 脏标记置位后到实际落盘的去抖间隔（秒）：窗口内的连续写入合并为一次保存
+_FLUSH_INTERVAL = 0.5
+
 class MemoryManager:
     """记忆管理器，负责记忆的存储、检索和维护"""
     
@@ -34,14 +38,23 @@ class MemoryManager:
         # 初始化批量处理器
         self.batch_processor = BatchProcessor(self.vector_store)
         
-        # API 调用结果缓存
-        self._api_results: Dict[str, Any] = {}
+        # API 调用结果：memory_id -> Future，结果到达即唤醒等待方
+        self._api_results: Dict[str, asyncio.Future] = {}
         
         memory_logger.info("记忆管理器初始化完成")
         
         # 加载已有记忆
         self._load_existing_memories()
         
+        # 记忆ID序号：启动时按现有规模播种一次，此后next()即可，
+        # 同一秒内的多次添加不会再因len(vector_store)未变而撞ID
+        self._id_counter = itertools.count(len(self.vector_store))
+        
+        # 状态保存去抖：添加路径只置脏标记，后台任务合并落盘
+        self._dirty = asyncio.Event()
+        self._save_lock = asyncio.Lock()
+        self._flusher_task: Optional[asyncio.Task] = None
+        
         # 启动定期优化任务
         self._start_optimization_task()
     
@@ -69,6 +82,47 @@ class MemoryManager:
         # 在后台运行优化任务
         asyncio.create_task(optimize_periodically())
     
+    def _mark_dirty(self) -> None:
+        """标记状态待保存，并确保后台刷写任务在运行"""
+        self._dirty.set()
+        if self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.create_task(self._flush_periodically())
+    
+    async def _flush_periodically(self) -> None:
+        """后台合并落盘：等到有脏数据后小睡一个去抖窗口再保存，
+        窗口内的N次添加只产生一次完整状态写入"""
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(_FLUSH_INTERVAL)
+            self._dirty.clear()
+            try:
+                async with self._save_lock:
+                    await self._save_state()
+            except Exception as e:
+                memory_logger.error(f"后台保存状态失败: {str(e)}")
+    
+    async def cleanup(self) -> None:
+        """停止后台刷写任务并保证最终状态落盘"""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        if self._dirty.is_set():
+            self._dirty.clear()
+            async with self._save_lock:
+                await self._save_state()
+    
+    def _api_result_future(self, memory_id: str) -> asyncio.Future:
+        """取出或创建该记忆对应的结果Future"""
+        fut = self._api_results.get(memory_id)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._api_results[memory_id] = fut
+        return fut
+    
     async def set_api_result(self, memory_id: str, result: Any) -> None:
         """
         设置 API 调用结果
@@ -77,12 +131,18 @@ class MemoryManager:
             memory_id: 记忆ID
             result: API 调用结果
         """
-        self._api_results[memory_id] = result
+        fut = self._api_result_future(memory_id)
+        if not fut.done():
+            fut.set_result(result)
     
     async def get_api_result(self, memory_id: str, timeout: float = 10.0) -> Optional[Any]:
         """
         获取 API 调用结果，如果结果未就绪则等待
         
+        之前的实现每100ms轮询一次结果字典，平均给每次取结果
+        多加50ms延迟且空转唤醒事件循环；改用Future后结果一设置
+        等待方立即恢复，超时由wait_for的单个定时器处理
+        
         Args:
             memory_id: 记忆ID
             timeout: 超时时间（秒）
@@ -90,16 +150,13 @@ class MemoryManager:
         Returns:
             Optional[Any]: API 调用结果，如果超时则返回 None
         """
-        start_time = datetime.now()
-        while True:
-            if memory_id in self._api_results:
-                result = self._api_results.pop(memory_id)
-                return result
-            
-            if (datetime.now() - start_time).total_seconds() > timeout:
-                return None
-                
-            await asyncio.sleep(0.1)
+        fut = self._api_result_future(memory_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._api_results.pop(memory_id, None)
     
     async def get_complete_content(
         self,
@@ -152,7 +209,7 @@ class MemoryManager:
         """
         try:
             # 生成记忆ID
-            memory_id = f"memory_{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(self.vector_store)}"
+            memory_id = f"memory_{datetime.now().strftime('%Y%m%d%H%M%S')}_{next(self._id_counter)}"
             
             # 获取完整内容
             if wait_for_api:
@@ -165,8 +222,8 @@ class MemoryManager:
                 metadata=metadata
             )
             
-            # 保存状态
-            await self._save_state()
+            # 置脏标记即可，落盘由后台任务去抖合并
+            self._mark_dirty()
             
             memory_logger.info(f"成功添加新记忆: {memory_id}")
             return memory_id
@@ -196,7 +253,7 @@ class MemoryManager:
             processed_memories = []
             
             for memory in memories:
-                memory_id = f"memory_{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(self.vector_store) + len(memory_ids)}"
+                memory_id = f"memory_{datetime.now().strftime('%Y%m%d%H%M%S')}_{next(self._id_counter)}"
                 memory_ids.append(memory_id)
                 
                 processed_memories.append({
@@ -211,8 +268,8 @@ class MemoryManager:
                 show_progress=show_progress
             )
             
-            # 保存状态
-            await self._save_state()
+            # 置脏标记即可，落盘由后台任务去抖合并
+            self._mark_dirty()
             
             memory_logger.info(f"成功批量添加 {len(memory_ids)} 条记忆")
             return memory_ids
@@ -75,6 +75,7 @@ class SemanticMemoryStore(MemoryStore):
         super().__init__()
         self.max_concepts = max_concepts
         self.min_relation_strength = min_relation_strength
+        self.memories: Dict[str, SemanticMemory] = {}  # 记忆主存储
         self.concepts = {}  # 概念存储
         self.concept_index = defaultdict(set)  # 概念到记忆的索引
 
@@ -154,23 +155,52 @@ class SemanticMemoryStore(MemoryStore):
         except Exception as e:
             raise MemoryStorageException(f"删除语义记忆失败: {str(e)}")
 
+    @staticmethod
+    def _max_concept_weight(memory: SemanticMemory) -> float:
+        """记忆的最大概念权重，首次计算后缓存在对象上
+
+        update/delete都是整对象替换，缓存无需显式失效
+        """
+        weight = getattr(memory, "_max_weight", None)
+        if weight is None:
+            weight = max(memory.concept_weights.values(), default=float("-inf"))
+            memory._max_weight = weight
+        return weight
+
     def list(self, filters: Dict[str, Any] = None) -> List[SemanticMemory]:
-        """列出语义记忆"""
+        """列出语义记忆
+
+        按概念过滤时直接在倒排索引上求交集、按命中ID取对象，
+        不再先物化全量记忆再逐条成员测试；交集以最小桶为种子，
+        中间结果尽早收敛
+        """
         try:
-            memories = list(self.memories.values())
-
-            if filters:
-                if "concepts" in filters:
-                    concept_memories = set.intersection(
-                        *[self.concept_index[concept] for concept in filters["concepts"]]
-                    )
-                    memories = [m for m in memories if m.memory_id in concept_memories]
-
-                if "min_weight" in filters:
-                    memories = [
-                        m for m in memories 
-                        if any(w >= filters["min_weight"] for w in m.concept_weights.values())
-                    ]
+            if filters and "concepts" in filters:
+                buckets = sorted(
+                    (
+                        self.concept_index.get(concept, set())
+                        for concept in filters["concepts"]
+                    ),
+                    key=len
+                )
+                if buckets:
+                    concept_memories = buckets[0].intersection(*buckets[1:])
+                else:
+                    concept_memories = set()
+                memories = [
+                    self.memories[mid]
+                    for mid in concept_memories
+                    if mid in self.memories
+                ]
+            else:
+                memories = list(self.memories.values())
+
+            if filters and "min_weight" in filters:
+                min_weight = filters["min_weight"]
+                memories = [
+                    m for m in memories
+                    if self._max_concept_weight(m) >= min_weight
+                ]
 
             return sorted(memories, key=lambda x: x.importance_score, reverse=True)
         except Exception as e:
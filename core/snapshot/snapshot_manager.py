@@ -2,14 +2,27 @@
 快照管理模块
 """
 from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime
+import numpy as np
 from core.storage.memory_storage import MemoryStorage
 from core.models.database import Memory, Snapshot
+from config.prompts import render_prompt
 from services.llm_service import LLMService
 from utils.logger import get_logger
 
 snapshot_logger = get_logger('snapshot')
 
+# 时间衰减权重（按天），越新的快照得分越高
+RECENCY_WEIGHT_PER_DAY = 0.1
+
+# LLM相关度打分结果缓存容量
+SCORE_CACHE_CAPACITY = 256
+
+# 参与相关度打分的快照内容截断长度：
+# 摘要的前几句已足够打分，完整内容只会线性放大提示词体积
+SNIPPET_MAX_CHARS = 200
+
 class SnapshotManager:
     """快照管理器"""
     
@@ -23,8 +36,21 @@ class SnapshotManager:
         """
         self.storage = storage
         self.llm_service = llm_service
+        # 相同查询在快照集不变时复用LLM打分结果，省掉一次LLM调用
+        self._score_cache: "OrderedDict[Tuple[str, int, int], List[float]]" = OrderedDict()
+        # 快照时间戳的epoch秒缓存：datetime.timestamp()只在首次见到该快照时计算
+        self._epoch_cache: Dict[int, float] = {}
         snapshot_logger.info("快照管理器初始化完成")
     
+    def invalidate_caches(self) -> None:
+        """清空按快照ID键控的缓存
+
+        清库后SQLite会复用整数主键，残留的打分/时间戳缓存会把
+        旧快照的数据套在新快照上，清空操作方必须调用本方法
+        """
+        self._score_cache.clear()
+        self._epoch_cache.clear()
+    
     async def create_snapshot(self, memory: Memory) -> Snapshot:
         """
         从记忆创建快照
@@ -36,15 +62,8 @@ class SnapshotManager:
             Snapshot: 创建的快照对象
         """
         try:
-            # 使用LLM生成快照内容
-            prompt = f"""请总结以下内容的关键信息，并返回JSON格式：
-{memory.content}
-
-请返回以下格式：
-{{
-    "summary": "一句话总结",
-    "key_points": ["要点1", "要点2", ...]
-}}"""
+            # 使用LLM生成快照内容（模板集中在config.prompts里预解析）
+            prompt = render_prompt('summarize', content=memory.content)
             result = await self.llm_service.generate_json(prompt)
             
             # 生成快照内容
@@ -91,26 +110,50 @@ class SnapshotManager:
             if not snapshots:
                 return []
             
-            # 构建提示词
-            contents = [f"- {s.content}" for s in snapshots]
-            prompt = f"""请评估以下内容与查询"{query}"的相关度（0-1分）：
-            
-{chr(10).join(contents)}
+            # 缓存键包含快照数量和最新快照ID，快照集变化时自动失效
+            cache_key = (query, len(snapshots), snapshots[-1].id)
+            scores = self._score_cache.get(cache_key)
+            if scores is not None:
+                self._score_cache.move_to_end(cache_key)
+            else:
+                # 只在缓存未命中时构建提示词，且每条快照内容截断后参与打分
+                contents = [f"- {s.content[:SNIPPET_MAX_CHARS]}" for s in snapshots]
+                prompt = render_prompt(
+                    'evaluate_relevance',
+                    query=query,
+                    contents="\n".join(contents)
+                )
 
-请返回一个JSON对象，包含每条内容的相关度分数，格式如下：
-{{
-    "scores": [0.8, 0.2, 0.5, ...]
-}}"""
-            
-            # 使用LLM评估相关度
-            result = await self.llm_service.generate_json(prompt)
-            scores = result.get('scores', [0] * len(snapshots))
-            
-            # 将快照和分数配对并排序
-            snapshot_scores = list(zip(snapshots, scores))
-            snapshot_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            return snapshot_scores[:limit]
+                # 使用LLM评估相关度
+                result = await self.llm_service.generate_json(prompt)
+                scores = result.get('scores', [0] * len(snapshots))
+                # LLM返回的分数数量可能与快照数不一致，按快照数对齐
+                scores = (list(scores) + [0] * len(snapshots))[:len(snapshots)]
+                self._score_cache[cache_key] = scores
+                if len(self._score_cache) > SCORE_CACHE_CAPACITY:
+                    self._score_cache.popitem(last=False)
+
+            # 向量化的时间衰减重排：相关度除以按天衰减的时间因子，
+            # 一次C级运算代替逐条Python算术，argpartition取top-k为O(N)
+            now = datetime.now().timestamp()
+            score_arr = np.asarray(scores, dtype=np.float64)
+            epoch_cache = self._epoch_cache
+            ts_arr = np.fromiter(
+                (
+                    epoch_cache.get(s.id) or epoch_cache.setdefault(s.id, s.timestamp.timestamp())
+                    for s in snapshots
+                ),
+                dtype=np.float64, count=len(snapshots)
+            )
+            weights = score_arr / (
+                1.0 + (RECENCY_WEIGHT_PER_DAY / 86400.0) * (now - ts_arr)
+            )
+
+            k = min(limit, len(snapshots))
+            idx = np.argpartition(-weights, k - 1)[:k]
+            idx = idx[np.argsort(-weights[idx])]
+
+            return [(snapshots[i], float(weights[i])) for i in idx]
             
         except Exception as e:
             snapshot_logger.error("获取相关快照失败：%s", str(e))
@@ -8,6 +8,18 @@ sys.path.insert(0, current_dir)
 # 启动FastAPI应用
 if __name__ == "__main__":
     import uvicorn
-    from api.main import app
-    
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+
+    # 使用uvloop事件循环 + httptools协议解析
+    # API层的列表/响应缓存是进程内的，失效通知不会跨worker传播，
+    # 默认单worker；需要横向扩展时用UVICORN_WORKERS显式指定
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        # uvloop在Windows上不可用，可通过UVICORN_LOOP=asyncio回退
+        loop=os.getenv("UVICORN_LOOP", "uvloop"),
+        http=os.getenv("UVICORN_HTTP", "httptools"),
+        ws="websockets",
+        ws_per_message_deflate=True,
+    )
@@ -212,9 +212,11 @@ class LLMService:
                     '错误处理',
                     error_message
                 )
+                # error标记供调用方识别失败结果，不要对兜底文案做字符串匹配
                 return {
                     'response': '抱歉，我现在无法回答您的问题。请稍后再试。',
-                    'thinking_steps': self.thinking_steps
+                    'thinking_steps': self.thinking_steps,
+                    'error': True
                 }
             
         except Exception as e:
@@ -227,7 +229,8 @@ class LLMService:
             )
             return {
                 'response': '抱歉，处理您的请求时出现了错误。请稍后再试。',
-                'thinking_steps': self.thinking_steps
+                'thinking_steps': self.thinking_steps,
+                'error': True
             }
 
     async def analyze_api(self, query: str, api_docs: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
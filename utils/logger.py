@@ -2,34 +2,52 @@
 日志工具模块
 """
 import os
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import List, Optional
+
+# 保持对监听器的引用，进程退出时统一停止并刷新
+_listeners: List[QueueListener] = []
+
+def _stop_listeners():
+    """停止所有日志监听器"""
+    for listener in _listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+atexit.register(_stop_listeners)
 
 def get_logger(name: str) -> logging.Logger:
     """
     获取日志记录器
-    
+
+    日志记录通过QueueHandler写入内存队列，格式化和磁盘/控制台输出
+    由后台QueueListener线程完成，调用方几乎无阻塞开销
+
     Args:
         name: 日志记录器名称
-        
+
     Returns:
         logging.Logger: 日志记录器实例
     """
     logger = logging.getLogger(name)
-    
+
     # 如果已经有处理器，直接返回
     if logger.handlers:
         return logger
-        
+
     # 设置日志级别
     logger.setLevel(logging.INFO)
-    
+
     # 创建日志目录
     log_dir = "logs"
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
-        
+
     # 创建文件处理器
     log_file = os.path.join(log_dir, f"{name}.log")
     file_handler = RotatingFileHandler(
@@ -39,26 +57,35 @@ def get_logger(name: str) -> logging.Logger:
         encoding='utf-8'
     )
     file_handler.setLevel(logging.INFO)
-    
+
     # 创建控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    
+
     # 设置日志格式
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
-    
-    # 添加处理器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+
+    # 请求路径上只入队，实际输出由后台线程处理
+    log_queue: "queue.Queue" = queue.Queue(-1)
+    listener = QueueListener(
+        log_queue,
+        file_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    _listeners.append(listener)
+
+    logger.addHandler(QueueHandler(log_queue))
+
     return logger
 
 # 预定义的日志记录器
 api_logger = get_logger('api')
 storage_logger = get_logger('storage')
 memory_logger = get_logger('memory')
-chat_logger = get_logger('chat') 
\ No newline at end of file
+chat_logger = get_logger('chat')